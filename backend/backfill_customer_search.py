@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+customer search fields backfill script
+populate username_lc / email_lc / email_domain / search_tokens on existing customers,
+so the admin prefix search and typeahead can find them
+"""
+import asyncio
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from database.connection import get_collection, connect_to_mongo, close_mongo_connection
+from database.migrations import migrate_in_batches
+from utils.customer_search import customer_search_fields
+
+def build_search_update(doc: dict):
+    """build the normalized search fields for one customer"""
+    return UpdateOne({"_id": doc["_id"]}, {"$set": customer_search_fields(doc)})
+
+async def backfill_customer_search():
+    """backfill customer search fields"""
+    try:
+        await connect_to_mongo()
+
+        collection = await get_collection("customers")
+        print("🔄 backfilling customers...")
+        modified = await migrate_in_batches(
+            collection,
+            {"search_tokens": {"$exists": False}},
+            build_search_update,
+            projection={"username": 1, "email": 1, "full_name": 1}
+        )
+        print(f"✅ customers: {modified} documents backfilled")
+
+    except Exception as e:
+        print(f"❌ backfill failed: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    load_dotenv("config.env")
+    print("🚀 start backfilling customer search fields...")
+    asyncio.run(backfill_customer_search())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+customer statistics backfill script
+recompute total_orders / total_spent on every customer from the orders collection,
+repairing any drift in the incrementally maintained values
+"""
+import asyncio
+from dotenv import load_dotenv
+
+from database.connection import get_collection, connect_to_mongo, close_mongo_connection
+from database.migrations import reconcile_from_aggregation
+from controllers.customer_controller import CustomerController
+
+def build_customer_stats(stats: dict) -> dict:
+    """customer fields from one aggregated statistics row"""
+    return {
+        "total_orders": stats["total_orders"],
+        "total_spent": float(stats["total_spent"] or 0)
+    }
+
+async def backfill_customer_stats():
+    """backfill customer order statistics"""
+    try:
+        await connect_to_mongo()
+
+        orders_collection = await get_collection("orders")
+        customers_collection = await get_collection("customers")
+
+        pipeline = [{"$group": CustomerController.ORDER_STATS_GROUP}]
+        updated, reset = await reconcile_from_aggregation(
+            customers_collection,
+            orders_collection.aggregate(pipeline, allowDiskUse=True),
+            build_customer_stats,
+            "stats_reconciled_at",
+            {"total_orders": 0, "total_spent": 0.0}
+        )
+
+        print(f"✅ updated statistics for {updated} customers with orders")
+        print(f"✅ reset statistics for {reset} customers without orders")
+
+    except Exception as e:
+        print(f"❌ backfill failed: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    load_dotenv("config.env")
+    print("🚀 start backfilling customer order statistics...")
+    asyncio.run(backfill_customer_stats())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+product sales backfill script
+recompute sales_count (units sold) / sales_revenue on every product from the orders collection,
+repairing any drift in the incrementally maintained values
+"""
+import asyncio
+from dotenv import load_dotenv
+
+from database.connection import get_collection, connect_to_mongo, close_mongo_connection
+from database.migrations import reconcile_from_aggregation
+from models.order import REVENUE_EXCLUDED_STATUSES
+
+def build_product_sales(stats: dict) -> dict:
+    """product fields from one aggregated sales row"""
+    return {
+        "sales_count": stats["sales_count"],
+        "sales_revenue": float(stats["sales_revenue"] or 0)
+    }
+
+async def backfill_product_sales():
+    """backfill product sales statistics"""
+    try:
+        await connect_to_mongo()
+
+        orders_collection = await get_collection("orders")
+        products_collection = await get_collection("products")
+
+        pipeline = [
+            {"$match": {"status": {"$nin": [s.value for s in REVENUE_EXCLUDED_STATUSES]}}},
+            {"$unwind": "$items"},
+            {"$group": {
+                "_id": "$items.product_id",
+                "sales_count": {"$sum": "$items.quantity"},
+                "sales_revenue": {"$sum": "$items.subtotal"}
+            }}
+        ]
+        updated, reset = await reconcile_from_aggregation(
+            products_collection,
+            orders_collection.aggregate(pipeline, allowDiskUse=True),
+            build_product_sales,
+            "sales_reconciled_at",
+            {"sales_count": 0, "sales_revenue": 0.0}
+        )
+
+        print(f"✅ updated sales for {updated} products with sales")
+        print(f"✅ reset sales for {reset} products without sales")
+
+    except Exception as e:
+        print(f"❌ backfill failed: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    load_dotenv("config.env")
+    print("🚀 start backfilling product sales statistics...")
+    asyncio.run(backfill_product_sales())
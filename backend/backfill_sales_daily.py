@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+daily sales rollup backfill script
+rebuild the sales_daily collection (orders, revenue, units and per-category splits per day)
+from the orders collection, repairing any drift in the incrementally maintained rollup
+"""
+import asyncio
+from datetime import datetime
+from dotenv import load_dotenv
+from pymongo import ReplaceOne
+
+from database.connection import get_collection, connect_to_mongo, close_mongo_connection
+from controllers.dashboard_controller import DashboardController, SALES_DAILY_COLLECTION
+from models.order import REVENUE_EXCLUDED_STATUSES
+
+# number of day documents written per bulk write
+BATCH_SIZE = 500
+
+def nest_increments(increments: dict) -> dict:
+    """turn dotted rollup increments into a nested document"""
+    document = {}
+    for path, value in increments.items():
+        target = document
+        *parents, field = path.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[field] = value
+    return document
+
+async def backfill_sales_daily():
+    """backfill daily sales rollup"""
+    try:
+        await connect_to_mongo()
+
+        orders_collection = await get_collection("orders")
+        rollup_collection = await get_collection(SALES_DAILY_COLLECTION)
+
+        # categories for every product referenced by an order
+        products_collection = await get_collection("products")
+        categories = {
+            str(doc["_id"]): doc.get("category")
+            async for doc in products_collection.find({}, {"category": 1})
+        }
+
+        excluded = [s.value for s in REVENUE_EXCLUDED_STATUSES]
+        days = {}
+        cursor = orders_collection.find({}, {"created_at": 1, "status": 1, "total_amount": 1, "items": 1})
+        async for order_doc in cursor:
+            created_at = order_doc.get("created_at")
+            if not isinstance(created_at, datetime):
+                continue
+            revenue_sign = 0 if order_doc.get("status") in excluded else 1
+            increments = DashboardController.sales_increments(order_doc, categories, 1, revenue_sign)
+
+            day = days.setdefault(DashboardController.day_key(created_at), {
+                "date": created_at.replace(hour=0, minute=0, second=0, microsecond=0),
+                "increments": {"orders": 0, "revenue_orders": 0, "revenue": 0, "units": 0}
+            })
+            for field, value in increments.items():
+                day["increments"][field] = day["increments"].get(field, 0) + value
+
+        run_started_at = datetime.now()
+        batch = []
+        for day_id, day in days.items():
+            document = nest_increments(day["increments"])
+            document.update({"date": day["date"], "updated_at": run_started_at})
+            batch.append(ReplaceOne({"_id": day_id}, document, upsert=True))
+            if len(batch) >= BATCH_SIZE:
+                await rollup_collection.bulk_write(batch, ordered=False)
+                batch = []
+
+        if batch:
+            await rollup_collection.bulk_write(batch, ordered=False)
+
+        # days that no longer have orders
+        result = await rollup_collection.delete_many({"_id": {"$nin": list(days)}})
+
+        print(f"✅ rebuilt {len(days)} daily sales documents")
+        print(f"✅ removed {result.deleted_count} days without orders")
+
+    except Exception as e:
+        print(f"❌ backfill failed: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    load_dotenv("config.env")
+    print("🚀 start backfilling daily sales rollup...")
+    asyncio.run(backfill_sales_daily())
@@ -1,3 +1,4 @@
+import os
 from datetime import datetime
 from typing import Optional
 from bson import ObjectId
@@ -5,8 +6,19 @@ from fastapi import HTTPException, status
 
 from database.connection import get_collection
 from models.customer import Customer, CustomerCreate, CustomerLogin, CustomerResponse
-from utils.auth import verify_password, get_password_hash, create_access_token, create_refresh_token
+from utils.auth import verify_password_async, get_password_hash_async, create_access_token, create_refresh_token, user_role, invalidate_user_flags
 from utils.response import APIException
+from utils.rate_limit import SlidingWindowLimiter
+from utils.metrics import metrics
+from utils.customer_search import CUSTOMER_SEARCH_SOURCE_FIELDS, customer_search_fields, strip_customer_search_fields
+
+# Login throttling: attempts per client IP and failed attempts per username within the window
+LOGIN_RATE_WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_WINDOW_SECONDS", "300"))
+LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "30"))
+LOGIN_MAX_FAILURES_PER_USERNAME = int(os.getenv("LOGIN_MAX_FAILURES_PER_USERNAME", "5"))
+
+login_ip_limiter = SlidingWindowLimiter(LOGIN_MAX_ATTEMPTS_PER_IP, LOGIN_RATE_WINDOW_SECONDS)
+login_username_limiter = SlidingWindowLimiter(LOGIN_MAX_FAILURES_PER_USERNAME, LOGIN_RATE_WINDOW_SECONDS)
 
 class AuthController:
     """User authentication controller"""
@@ -27,7 +39,7 @@ class AuthController:
             raise APIException("Email already exists", status.HTTP_400_BAD_REQUEST)
         
         # Create new user
-        hashed_password = get_password_hash(customer_data.password)
+        hashed_password = await get_password_hash_async(customer_data.password)
         customer = Customer(
             username=customer_data.username,
             email=customer_data.email,
@@ -40,10 +52,12 @@ class AuthController:
         )
         
         # Insert into database
-        result = await collection.insert_one(customer.dict(by_alias=True, exclude={"id"}))
+        customer_doc = customer.dict(by_alias=True, exclude={"id"})
+        customer_doc.update(customer_search_fields(customer_doc))
+        result = await collection.insert_one(customer_doc)
         
         # Generate tokens
-        access_token = create_access_token(data={"sub": str(result.inserted_id)})
+        access_token = create_access_token(data={"sub": str(result.inserted_id), "role": user_role(customer_doc)})
         refresh_token = create_refresh_token(data={"sub": str(result.inserted_id)})
         
         # Get user information
@@ -51,6 +65,7 @@ class AuthController:
         user_doc["id"] = str(user_doc["_id"])
         del user_doc["_id"]
         del user_doc["hashed_password"]
+        strip_customer_search_fields(user_doc)
         
         return {
             "user": user_doc,
@@ -60,8 +75,11 @@ class AuthController:
         }
     
     @staticmethod
-    async def login_customer(login_data: CustomerLogin) -> dict:
+    async def login_customer(login_data: CustomerLogin, client_ip: Optional[str] = None) -> dict:
         """User login - supports both username and email"""
+        username_key = login_data.username.strip().lower()
+        AuthController._check_login_rate(client_ip, username_key)
+        
         collection = await get_collection("customers")
         
         # Find user by username or email
@@ -73,24 +91,29 @@ class AuthController:
         })
         
         if not user_doc:
+            login_username_limiter.hit(username_key)
             raise APIException("Incorrect username or password", status.HTTP_401_UNAUTHORIZED)
         
         # Verify password
-        if not verify_password(login_data.password, user_doc["hashed_password"]):
+        if not await verify_password_async(login_data.password, user_doc["hashed_password"]):
+            login_username_limiter.hit(username_key)
             raise APIException("Incorrect username or password", status.HTTP_401_UNAUTHORIZED)
         
+        login_username_limiter.reset(username_key)
+        
         # Check user status
         if not user_doc.get("is_active", True):
             raise APIException("Account has been disabled", status.HTTP_401_UNAUTHORIZED)
         
         # Generate tokens
-        access_token = create_access_token(data={"sub": str(user_doc["_id"])})
+        access_token = create_access_token(data={"sub": str(user_doc["_id"]), "role": user_role(user_doc)})
         refresh_token = create_refresh_token(data={"sub": str(user_doc["_id"])})
         
         # Return user information
         user_doc["id"] = str(user_doc["_id"])
         del user_doc["_id"]
         del user_doc["hashed_password"]
+        strip_customer_search_fields(user_doc)
         
         return {
             "user": user_doc,
@@ -99,6 +122,27 @@ class AuthController:
             "token_type": "bearer"
         }
     
+    @staticmethod
+    def _check_login_rate(client_ip: Optional[str], username_key: str):
+        """Reject throttled logins before any password verification"""
+        if client_ip:
+            if login_ip_limiter.is_limited(client_ip):
+                metrics.inc("login_throttled_ip_total")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please try again later",
+                    headers={"Retry-After": str(login_ip_limiter.retry_after(client_ip))},
+                )
+            login_ip_limiter.hit(client_ip)
+        
+        if login_username_limiter.is_limited(username_key):
+            metrics.inc("login_throttled_username_total")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts, please try again later",
+                headers={"Retry-After": str(login_username_limiter.retry_after(username_key))},
+            )
+    
     @staticmethod
     async def get_user_profile(user_id: str) -> CustomerResponse:
         """Get user profile"""
@@ -129,6 +173,13 @@ class AuthController:
         if result.matched_count == 0:
             raise APIException("User not found", status.HTTP_404_NOT_FOUND)
         
+        invalidate_user_flags(user_id)
+        
+        if any(field in update_data for field in CUSTOMER_SEARCH_SOURCE_FIELDS):
+            from controllers.customer_controller import CustomerController
+            user_doc = await collection.find_one({"_id": ObjectId(user_id)})
+            await CustomerController.refresh_search_fields(user_doc)
+        
         # Return updated user information
         return await AuthController.get_user_profile(user_id)
     
@@ -147,8 +198,8 @@ class AuthController:
         if not user_doc:
             raise APIException("User not found", status.HTTP_404_NOT_FOUND)
         
-        # Generate new access token
-        access_token = create_access_token(data={"sub": user_id})
+        # Generate new access token, picking up role changes since the last login
+        access_token = create_access_token(data={"sub": user_id, "role": user_role(user_doc)})
         
         return {
             "access_token": access_token,
@@ -166,11 +217,11 @@ class AuthController:
             raise APIException("User not found", status.HTTP_404_NOT_FOUND)
         
         # Verify current password
-        if not verify_password(current_password, user_doc["hashed_password"]):
+        if not await verify_password_async(current_password, user_doc["hashed_password"]):
             raise APIException("Current password is incorrect", status.HTTP_400_BAD_REQUEST)
         
         # Hash new password
-        new_hashed_password = get_password_hash(new_password)
+        new_hashed_password = await get_password_hash_async(new_password)
         
         # Update password in database
         result = await collection.update_one(
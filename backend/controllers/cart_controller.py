@@ -8,6 +8,7 @@ from models.cart import CartItem, CartItemCreate, CartItemUpdate, CartItemRespon
 from models.product import ProductResponse
 from controllers.product_controller import ProductController
 from utils.response import APIException
+from utils.ids import customer_key, customer_match
 
 class CartController:
     """Shopping cart management controller"""
@@ -35,7 +36,7 @@ class CartController:
         
         # Check if item already exists in cart
         existing_item = await collection.find_one({
-            "customer_id": ObjectId(customer_id),
+            "customer_id": customer_match(customer_id),
             "product_id": ObjectId(add_item.product_id)
         })
         
@@ -46,12 +47,10 @@ class CartController:
                 raise APIException("Insufficient stock", status.HTTP_400_BAD_REQUEST)
             
             await collection.update_one(
-                {
-                    "customer_id": ObjectId(customer_id),
-                    "product_id": ObjectId(add_item.product_id)
-                },
+                {"_id": existing_item["_id"]},
                 {
                     "$set": {
+                        "customer_id": customer_key(customer_id),
                         "quantity": new_quantity,
                         "updated_at": datetime.now()
                     }
@@ -60,7 +59,7 @@ class CartController:
         else:
             # Add new item
             cart_item_doc = {
-                "customer_id": ObjectId(customer_id),
+                "customer_id": customer_key(customer_id),
                 "product_id": ObjectId(add_item.product_id),
                 "product_name": product.name,
                 "product_price": product.price,
@@ -83,7 +82,7 @@ class CartController:
             raise APIException("Invalid customer ID", status.HTTP_400_BAD_REQUEST)
         
         # Get all cart items
-        cart_items = await collection.find({"customer_id": ObjectId(customer_id)}).to_list(length=None)
+        cart_items = await collection.find({"customer_id": customer_match(customer_id)}).to_list(length=None)
         
         # Convert to response model
         item_responses = []
@@ -140,7 +139,7 @@ class CartController:
         # Update cart item
         result = await collection.update_one(
             {
-                "customer_id": ObjectId(customer_id),
+                "customer_id": customer_match(customer_id),
                 "product_id": ObjectId(product_id)
             },
             {
@@ -168,7 +167,7 @@ class CartController:
             raise APIException("Invalid product ID", status.HTTP_400_BAD_REQUEST)
         
         result = await collection.delete_one({
-            "customer_id": ObjectId(customer_id),
+            "customer_id": customer_match(customer_id),
             "product_id": ObjectId(product_id)
         })
         
@@ -186,7 +185,7 @@ class CartController:
         if not ObjectId.is_valid(customer_id):
             raise APIException("Invalid customer ID", status.HTTP_400_BAD_REQUEST)
         
-        result = await collection.delete_many({"customer_id": ObjectId(customer_id)})
+        result = await collection.delete_many({"customer_id": customer_match(customer_id)})
         
         return result.deleted_count >= 0
     
@@ -200,7 +199,7 @@ class CartController:
             raise APIException("Invalid customer ID", status.HTTP_400_BAD_REQUEST)
         
         pipeline = [
-            {"$match": {"customer_id": ObjectId(customer_id)}},
+            {"$match": {"customer_id": customer_match(customer_id)}},
             {"$group": {"_id": None, "total": {"$sum": "$quantity"}}}
         ]
         
@@ -2,12 +2,31 @@ from typing import List, Tuple, Optional
 from bson import ObjectId
 from fastapi import HTTPException, status
 from datetime import datetime
+import re
 
 from database.connection import get_collection
 from models.customer import Customer, CustomerCreate, CustomerUpdate, CustomerSearch, CustomerResponse
-from models.order import Order
+from models.order import Order, REVENUE_EXCLUDED_STATUSES
+from utils.ids import customer_key, customer_match
+from utils.auth import invalidate_user_flags
+from utils.customer_search import CUSTOMER_SEARCH_SOURCE_FIELDS, customer_search_fields, strip_customer_search_fields, build_customer_search_query
 
 class CustomerController:
+    # Order statistics per customer, total_spent excludes cancelled and refunded orders
+    ORDER_STATS_GROUP = {
+        "_id": {"$toString": "$customer_id"},
+        "total_orders": {"$sum": 1},
+        "total_spent": {
+            "$sum": {
+                "$cond": [
+                    {"$in": ["$status", [s.value for s in REVENUE_EXCLUDED_STATUSES]]},
+                    0,
+                    "$total_amount"
+                ]
+            }
+        }
+    }
+    
     @staticmethod
     async def search_customers(
         search_params: CustomerSearch,
@@ -16,17 +35,20 @@ class CustomerController:
     ) -> Tuple[List[CustomerResponse], int]:
         """Search customers with pagination"""
         customers_collection = await get_collection("customers")
-        orders_collection = await get_collection("orders")
         
         # Build search query
         query = {}
-        if search_params.keyword:
-            keyword_regex = {"$regex": search_params.keyword, "$options": "i"}
+        if search_params.keyword and search_params.search_mode == "contains":
+            # Unanchored match, scans the whole collection
+            keyword_regex = {"$regex": re.escape(search_params.keyword), "$options": "i"}
             query["$or"] = [
                 {"full_name": keyword_regex},
                 {"email": keyword_regex},
                 {"username": keyword_regex}
             ]
+        elif search_params.keyword:
+            # Indexed prefix match on the normalized search fields
+            query = build_customer_search_query(search_params.keyword)
         
         # Get total count
         total = await customers_collection.count_documents(query)
@@ -42,29 +64,26 @@ class CustomerController:
         cursor = customers_collection.find(query).sort(sort_field, sort_direction).skip(skip).limit(size)
         customers_data = await cursor.to_list(length=size)
         
-        # Convert to CustomerResponse objects and calculate statistics
+        # Order statistics are maintained on the customer document, only customers
+        # that haven't been backfilled yet need them aggregated from orders
+        stats_by_customer = await CustomerController._get_order_stats(
+            [data["_id"] for data in customers_data if "total_orders" not in data]
+        )
+        
+        # Convert to CustomerResponse objects
         customers = []
         for data in customers_data:
-            customer_id = data["_id"]
-            
-            # Calculate order statistics for this customer
-            order_stats_pipeline = [
-                {"$match": {"customer_id": customer_id}},
-                {"$group": {
-                    "_id": None,
-                    "total_orders": {"$sum": 1},
-                    "total_spent": {"$sum": "$total_amount"}
-                }}
-            ]
-            
-            stats_result = await orders_collection.aggregate(order_stats_pipeline).to_list(1)
-            order_stats = stats_result[0] if stats_result else {"total_orders": 0, "total_spent": 0}
+            order_stats = stats_by_customer.get(
+                str(data["_id"]),
+                {"total_orders": data.get("total_orders", 0), "total_spent": data.get("total_spent", 0)}
+            )
             
             # Prepare customer data
             data["id"] = str(data["_id"])
             del data["_id"]
             # Remove sensitive data
             data.pop("hashed_password", None)
+            strip_customer_search_fields(data)
             
             # Add calculated statistics
             data["total_orders"] = order_stats["total_orders"]
@@ -74,6 +93,70 @@ class CustomerController:
         
         return customers, total
     
+    @staticmethod
+    async def typeahead(keyword: str, limit: int = 10) -> List[dict]:
+        """Customer suggestions for the admin search box"""
+        query = build_customer_search_query(keyword)
+        if not query:
+            return []
+        
+        collection = await get_collection("customers")
+        
+        # No count and no sort, so the prefix scan stops after limit matches
+        cursor = collection.find(query, {"username": 1, "email": 1, "full_name": 1}).limit(limit)
+        results = await cursor.to_list(length=limit)
+        
+        return [
+            {
+                "id": str(doc["_id"]),
+                "username": doc.get("username"),
+                "email": doc.get("email"),
+                "full_name": doc.get("full_name")
+            }
+            for doc in results
+        ]
+    
+    @staticmethod
+    async def refresh_search_fields(customer_doc: dict) -> None:
+        """Recompute the normalized search fields after username, email or name changed"""
+        collection = await get_collection("customers")
+        await collection.update_one(
+            {"_id": customer_doc["_id"]},
+            {"$set": customer_search_fields(customer_doc)}
+        )
+    
+    @staticmethod
+    async def _get_order_stats(customer_ids: List[ObjectId]) -> dict:
+        """Get order statistics keyed by customer ID string for a page of customers"""
+        if not customer_ids:
+            return {}
+        
+        orders_collection = await get_collection("orders")
+        
+        # Both stored forms until migrate_customer_ids.py has run, the group key is the string form
+        customer_keys = [customer_key(customer_id) for customer_id in customer_ids]
+        pipeline = [
+            {"$match": {"customer_id": {"$in": customer_keys + [ObjectId(key) for key in customer_keys]}}},
+            {"$group": CustomerController.ORDER_STATS_GROUP}
+        ]
+        
+        results = await orders_collection.aggregate(pipeline).to_list(length=None)
+        return {result["_id"]: result for result in results}
+    
+    @staticmethod
+    async def apply_order_stats(customer_id: str, orders_delta: int, spent_delta: float):
+        """Incrementally update a customer's maintained order statistics"""
+        if not ObjectId.is_valid(customer_id) or (orders_delta == 0 and spent_delta == 0):
+            return
+        
+        collection = await get_collection("customers")
+        
+        # Customers that haven't been backfilled yet are left for the backfill job
+        await collection.update_one(
+            {"_id": ObjectId(customer_id), "total_orders": {"$exists": True}},
+            {"$inc": {"total_orders": orders_delta, "total_spent": spent_delta}}
+        )
+    
     @staticmethod
     async def get_customer(customer_id: str) -> CustomerResponse:
         """Get customer by ID"""
@@ -98,6 +181,7 @@ class CustomerController:
         customer_data["id"] = str(customer_data["_id"])
         del customer_data["_id"]
         customer_data.pop("hashed_password", None)
+        strip_customer_search_fields(customer_data)
         
         return CustomerResponse(**customer_data)
     
@@ -127,7 +211,7 @@ class CustomerController:
             )
         
         # Build query for customer orders
-        query = {"customer_id": ObjectId(customer_id)}
+        query = {"customer_id": customer_match(customer_id)}
         
         # Get total count
         total = await orders_collection.count_documents(query)
@@ -179,11 +263,16 @@ class CustomerController:
                 detail="Customer not found"
             )
         
+        invalidate_user_flags(customer_id)
+        
         # Return updated customer
         updated_customer_data = await collection.find_one({"_id": ObjectId(customer_id)})
+        if any(field in update_dict for field in CUSTOMER_SEARCH_SOURCE_FIELDS):
+            await CustomerController.refresh_search_fields(updated_customer_data)
         updated_customer_data["id"] = str(updated_customer_data["_id"])
         del updated_customer_data["_id"]
         updated_customer_data.pop("hashed_password", None)
+        strip_customer_search_fields(updated_customer_data)
         
         return CustomerResponse(**updated_customer_data)
     
@@ -201,7 +290,7 @@ class CustomerController:
             )
         
         # Check if customer has any orders
-        order_count = await orders_collection.count_documents({"customer_id": ObjectId(customer_id)})
+        order_count = await orders_collection.count_documents({"customer_id": customer_match(customer_id)})
         if order_count > 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -210,6 +299,7 @@ class CustomerController:
         
         # Delete customer
         result = await customers_collection.delete_one({"_id": ObjectId(customer_id)})
+        invalidate_user_flags(customer_id)
         
         if result.deleted_count == 0:
             raise HTTPException(
@@ -0,0 +1,384 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+from bson import ObjectId
+from fastapi import HTTPException
+
+from database.connection import get_collection
+from models.order import REVENUE_EXCLUDED_STATUSES
+from utils.cache import TTLCache
+from utils.event_bus import event_bus
+from utils.datetimes import naive_local
+from utils.sales_analytics import GRANULARITIES, ANALYTICS_METRICS, ROW_COLUMNS, compute_sales_analytics
+
+# Daily sales rollup collection, one document per day keyed by "YYYY-MM-DD"
+SALES_DAILY_COLLECTION = "sales_daily"
+
+# Event bus topic of the live admin dashboard stream
+DASHBOARD_TOPIC = "dashboard"
+
+# Stock level at or below which a decrement raises a low stock alert
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", "5"))
+
+# Dashboard event per change in order count
+ORDER_EVENTS = {1: "order_created", 0: "order_updated", -1: "order_deleted"}
+
+# Assembled dashboard statistics are shared by every admin for a few seconds
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+
+# Upper bound on analytics buckets per request (a year of hours)
+ANALYTICS_MAX_BUCKETS = 24 * 366
+
+# Hours per bucket, used to bound the number of buckets of a request
+BUCKET_HOURS = {"hour": 1, "day": 24, "week": 24 * 7, "month": 24 * 28}
+
+class DashboardController:
+    """Admin dashboard statistics controller"""
+    
+    cache = TTLCache(maxsize=64, ttl=DASHBOARD_CACHE_TTL)
+    
+    @staticmethod
+    async def get_dashboard_stats() -> dict:
+        """Get dashboard statistics, cached for DASHBOARD_CACHE_TTL seconds"""
+        return await DashboardController.cache.get_or_load("stats", DashboardController._compute_dashboard_stats)
+    
+    @staticmethod
+    async def _compute_dashboard_stats() -> dict:
+        """Run the dashboard statistics queries concurrently"""
+        orders_collection = await get_collection("orders")
+        products_collection = await get_collection("products")
+        customers_collection = await get_collection("customers")
+        
+        now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        month_start = today.replace(day=1)
+        
+        (
+            total_orders,
+            total_products,
+            total_customers,
+            total_sales,
+            month_days
+        ) = await asyncio.gather(
+            # Unfiltered totals come from collection metadata instead of a count scan
+            orders_collection.estimated_document_count(),
+            products_collection.estimated_document_count(),
+            customers_collection.estimated_document_count(),
+            DashboardController._sum_sales_daily(),
+            DashboardController.get_sales_daily(month_start, today)
+        )
+        
+        today_key = DashboardController.day_key(today)
+        
+        return {
+            "total_orders": total_orders,
+            "total_products": total_products,
+            "total_customers": total_customers,
+            "today_orders": sum(day.get("orders", 0) for day in month_days if day["_id"] == today_key),
+            "total_revenue": total_sales.get("revenue", 0),
+            "month_revenue": sum(day.get("revenue", 0) for day in month_days)
+        }
+    
+    @staticmethod
+    async def get_sales_trends(days: int = 7) -> List[dict]:
+        """Daily revenue and order counts for the last days days (days without orders are omitted)"""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        sales_days = await DashboardController.get_sales_daily(today - timedelta(days=days - 1), today)
+        
+        return [
+            {
+                "_id": day["_id"],
+                "daily_revenue": day.get("revenue", 0),
+                "daily_orders": day.get("orders", 0)
+            }
+            for day in sales_days
+            if day.get("orders")
+        ]
+    
+    @staticmethod
+    async def get_sales_analytics(
+        start: Optional[datetime],
+        end: Optional[datetime],
+        granularity: str = "day",
+        metrics: Sequence[str] = ("orders", "revenue"),
+        window: int = 7
+    ) -> dict:
+        """Sales analytics over an arbitrary range, compared with the preceding range of equal length"""
+        if granularity not in GRANULARITIES:
+            raise HTTPException(status_code=400, detail=f"Invalid granularity, expected one of: {', '.join(GRANULARITIES)}")
+        unknown = [metric for metric in metrics if metric not in ANALYTICS_METRICS]
+        if unknown or not metrics:
+            raise HTTPException(status_code=400, detail=f"Invalid metrics, expected any of: {', '.join(ANALYTICS_METRICS)}")
+        
+        # created_at is stored as naive local time, aware bounds (e.g. "...Z") are converted to match
+        end = naive_local(end) if end else datetime.now()
+        start = naive_local(start) if start else end - timedelta(days=30)
+        if granularity == "hour":
+            # Hourly totals are the source, so ranges cover whole hours
+            start = start.replace(minute=0, second=0, microsecond=0)
+            end = end.replace(minute=59, second=59, microsecond=999999)
+        else:
+            # Daily rollups are the source, so ranges cover whole days
+            start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = end.replace(hour=23, minute=59, second=59, microsecond=999999)
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start_date must be before end_date")
+        if (end - start) / timedelta(hours=BUCKET_HOURS[granularity]) > ANALYTICS_MAX_BUCKETS:
+            raise HTTPException(status_code=400, detail="Range too large for the requested granularity")
+        
+        # Ranges end just before a boundary, so the previous range starts on one as well
+        previous_start = start - (end - start + timedelta(microseconds=1))
+        
+        load_rows = DashboardController._load_hourly_rows if granularity == "hour" else DashboardController._load_rollup_rows
+        (timestamps, rows), order_values = await asyncio.gather(
+            load_rows(previous_start, end),
+            DashboardController._load_order_values(start, end)
+        )
+        
+        # Vectorized computation runs off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            compute_sales_analytics,
+            timestamps, rows, order_values, start, end, previous_start, granularity, list(metrics), window
+        )
+    
+    @staticmethod
+    async def get_best_selling_products(days: Optional[int] = None, limit: int = 5) -> List[dict]:
+        """Best selling products, all time from products or over the last days days from the rollup"""
+        if not days:
+            products_collection = await get_collection("products")
+            cursor = products_collection.find({}).sort("sales_count", -1).limit(limit)
+            return [DashboardController._product_dict(product) for product in await cursor.to_list(limit)]
+        
+        return await DashboardController.cache.get_or_load(
+            ("best_sellers", days, limit),
+            lambda: DashboardController._compute_best_sellers(days, limit)
+        )
+    
+    @staticmethod
+    async def _compute_best_sellers(days: int, limit: int) -> List[dict]:
+        """Windowed best seller leaderboard from the per-product splits of the daily rollup"""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=days - 1)
+        
+        rollup_collection = await get_collection(SALES_DAILY_COLLECTION)
+        pipeline = [
+            {"$match": {"_id": {"$gte": DashboardController.day_key(start), "$lte": DashboardController.day_key(today)}}},
+            {"$project": {"products": {"$objectToArray": {"$ifNull": ["$products", {}]}}}},
+            {"$unwind": "$products"},
+            {"$group": {
+                "_id": "$products.k",
+                "units": {"$sum": "$products.v.units"},
+                "revenue": {"$sum": "$products.v.revenue"}
+            }},
+            {"$match": {"units": {"$gt": 0}}},
+            {"$sort": {"units": -1, "revenue": -1}},
+            {"$limit": limit}
+        ]
+        ranking = await rollup_collection.aggregate(pipeline).to_list(limit)
+        if not ranking:
+            return []
+        
+        products_collection = await get_collection("products")
+        cursor = products_collection.find({"_id": {"$in": [ObjectId(entry["_id"]) for entry in ranking]}})
+        products_by_id = {str(product["_id"]): product for product in await cursor.to_list(length=None)}
+        
+        best_sellers = []
+        for entry in ranking:
+            product = products_by_id.get(entry["_id"])
+            if product is None:
+                # Deleted products stay out of the leaderboard
+                continue
+            product["window_units"] = entry["units"]
+            product["window_revenue"] = entry["revenue"]
+            best_sellers.append(DashboardController._product_dict(product))
+        
+        return best_sellers
+    
+    @staticmethod
+    def _product_dict(product: dict) -> dict:
+        """Product document with its ObjectId converted to an id string"""
+        product["id"] = str(product.pop("_id"))
+        return product
+    
+    @staticmethod
+    async def _load_rollup_rows(start: datetime, end: datetime) -> tuple:
+        """Columnar rows from the daily sales rollup"""
+        sales_days = await DashboardController.get_sales_daily(start, end)
+        timestamps = [day["date"] for day in sales_days]
+        rows = {column: [day.get(column, 0) for day in sales_days] for column in ROW_COLUMNS}
+        return timestamps, rows
+    
+    @staticmethod
+    async def _load_order_values(start: datetime, end: datetime) -> List[float]:
+        """Values of the revenue-counted orders created in the range"""
+        collection = await get_collection("orders")
+        cursor = collection.find(
+            {
+                "created_at": {"$gte": start, "$lte": end},
+                "status": {"$nin": [s.value for s in REVENUE_EXCLUDED_STATUSES]}
+            },
+            {"_id": 0, "total_amount": 1}
+        ).batch_size(5000)
+        return [doc.get("total_amount", 0) async for doc in cursor]
+    
+    @staticmethod
+    async def _load_hourly_rows(start: datetime, end: datetime) -> tuple:
+        """Columnar hourly rows, totalled by the database so orders never reach the API process"""
+        collection = await get_collection("orders")
+        counted = {"$not": [{"$in": ["$status", [s.value for s in REVENUE_EXCLUDED_STATUSES]]}]}
+        pipeline = [
+            {"$match": {"created_at": {"$gte": start, "$lte": end}}},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": "$created_at", "unit": "hour"}},
+                "orders": {"$sum": 1},
+                "revenue_orders": {"$sum": {"$cond": [counted, 1, 0]}},
+                "revenue": {"$sum": {"$cond": [counted, {"$ifNull": ["$total_amount", 0]}, 0]}},
+                "units": {"$sum": {"$cond": [counted, {"$sum": "$items.quantity"}, 0]}}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+        hours = await collection.aggregate(pipeline).to_list(length=None)
+        timestamps = [hour["_id"] for hour in hours]
+        rows = {column: [hour[column] for hour in hours] for column in ROW_COLUMNS}
+        return timestamps, rows
+    
+    # ==================== Daily sales rollup ====================
+    
+    @staticmethod
+    def day_key(moment: datetime) -> str:
+        """Rollup document ID of the day containing moment"""
+        return moment.strftime("%Y-%m-%d")
+    
+    @staticmethod
+    def category_key(category: str) -> str:
+        """Category name usable as a field name in the rollup's categories split"""
+        return (category or "uncategorized").replace(".", "_").replace("$", "_")
+    
+    @staticmethod
+    async def get_sales_daily(start: datetime, end: datetime) -> List[dict]:
+        """Rollup documents for every day from start to end inclusive"""
+        collection = await get_collection(SALES_DAILY_COLLECTION)
+        cursor = collection.find({
+            "_id": {"$gte": DashboardController.day_key(start), "$lte": DashboardController.day_key(end)}
+        }).sort("_id", 1)
+        return await cursor.to_list(length=None)
+    
+    @staticmethod
+    async def _sum_sales_daily() -> dict:
+        """All-time order, revenue and unit totals from the rollup"""
+        collection = await get_collection(SALES_DAILY_COLLECTION)
+        pipeline = [
+            {"$group": {
+                "_id": None,
+                "orders": {"$sum": "$orders"},
+                "revenue": {"$sum": "$revenue"},
+                "units": {"$sum": "$units"}
+            }}
+        ]
+        result = await collection.aggregate(pipeline).to_list(1)
+        return result[0] if result else {}
+    
+    @staticmethod
+    async def get_product_categories(order_docs: List[dict]) -> Dict[str, str]:
+        """Category per product ID for the items of order_docs"""
+        product_ids = {
+            item["product_id"]
+            for order_doc in order_docs
+            for item in order_doc.get("items", [])
+            if ObjectId.is_valid(item.get("product_id"))
+        }
+        if not product_ids:
+            return {}
+        
+        collection = await get_collection("products")
+        cursor = collection.find({"_id": {"$in": [ObjectId(pid) for pid in product_ids]}}, {"category": 1})
+        return {str(doc["_id"]): doc.get("category") for doc in await cursor.to_list(length=None)}
+    
+    @staticmethod
+    def sales_increments(order_doc: dict, categories: Dict[str, str], orders_delta: int, revenue_sign: int) -> Dict[str, float]:
+        """$inc fields an order contributes to its day's rollup document
+        
+        orders_delta adjusts the order count, revenue_sign adds (+1) or removes (-1)
+        the order's revenue, units and revenue-counted order count, with per-category
+        and per-product splits from item subtotals.
+        """
+        increments: Dict[str, float] = {}
+        if orders_delta:
+            increments["orders"] = orders_delta
+        if not revenue_sign:
+            return increments
+        
+        increments["revenue_orders"] = revenue_sign
+        increments["revenue"] = revenue_sign * order_doc.get("total_amount", 0)
+        increments["units"] = 0
+        for item in order_doc.get("items", []):
+            quantity = revenue_sign * item.get("quantity", 0)
+            category = DashboardController.category_key(categories.get(item.get("product_id")))
+            increments["units"] += quantity
+            increments[f"categories.{category}.units"] = increments.get(f"categories.{category}.units", 0) + quantity
+            increments[f"categories.{category}.revenue"] = (
+                increments.get(f"categories.{category}.revenue", 0) + revenue_sign * item.get("subtotal", 0)
+            )
+            if ObjectId.is_valid(item.get("product_id")):
+                product = f"products.{item['product_id']}"
+                increments[f"{product}.units"] = increments.get(f"{product}.units", 0) + quantity
+                increments[f"{product}.revenue"] = increments.get(f"{product}.revenue", 0) + revenue_sign * item.get("subtotal", 0)
+        return increments
+    
+    @staticmethod
+    async def apply_order_sales(order_doc: dict, orders_delta: int, revenue_sign: int):
+        """Incrementally apply an order's contribution to the daily sales rollup"""
+        if not orders_delta and not revenue_sign:
+            return
+        
+        categories = await DashboardController.get_product_categories([order_doc])
+        increments = DashboardController.sales_increments(order_doc, categories, orders_delta, revenue_sign)
+        
+        created_at = order_doc.get("created_at") or datetime.now()
+        collection = await get_collection(SALES_DAILY_COLLECTION)
+        await collection.update_one(
+            {"_id": DashboardController.day_key(created_at)},
+            {
+                "$inc": increments,
+                "$set": {"updated_at": datetime.now()},
+                "$setOnInsert": {"date": created_at.replace(hour=0, minute=0, second=0, microsecond=0)}
+            },
+            upsert=True
+        )
+        
+        DashboardController.publish_order_delta(order_doc, created_at, increments)
+    
+    # ==================== Live dashboard stream ====================
+    
+    @staticmethod
+    def publish_order_delta(order_doc: dict, created_at: datetime, increments: Dict[str, float]):
+        """Push an order's change to the dashboard figures to live admin dashboards"""
+        if not event_bus.subscriber_count(DASHBOARD_TOPIC):
+            return
+        
+        event_bus.publish(DASHBOARD_TOPIC, ORDER_EVENTS.get(increments.get("orders", 0), "order_updated"), {
+            "order_id": str(order_doc.get("_id") or order_doc.get("id")),
+            "order_number": order_doc.get("order_number"),
+            "status": order_doc.get("status"),
+            "day": DashboardController.day_key(created_at),
+            "orders_delta": increments.get("orders", 0),
+            "revenue_delta": increments.get("revenue", 0),
+            "units_delta": increments.get("units", 0)
+        })
+    
+    @staticmethod
+    def publish_stock_level(product_doc: dict, quantity_change: int):
+        """Alert live admin dashboards when a stock decrement leaves a product low on stock"""
+        stock_quantity = product_doc.get("stock_quantity", 0)
+        if quantity_change >= 0 or stock_quantity > LOW_STOCK_THRESHOLD:
+            return
+        
+        event_bus.publish(DASHBOARD_TOPIC, "low_stock", {
+            "product_id": str(product_doc["_id"]),
+            "name": product_doc.get("name"),
+            "stock_quantity": stock_quantity,
+            "threshold": LOW_STOCK_THRESHOLD
+        })
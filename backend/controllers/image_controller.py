@@ -0,0 +1,105 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Set
+from bson import ObjectId
+from starlette.concurrency import run_in_threadpool
+
+from database.connection import get_collection
+from utils.images import render_variants, read_manifest
+from utils.metrics import metrics
+
+# Where uploaded product images are stored and the URL prefix they are served under
+PRODUCT_IMAGE_DIR = Path("frontend/src/assets/products")
+PRODUCT_IMAGE_URL = "/src/assets/products/"
+
+# Worker processes generating image derivatives
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+
+class ImageController:
+    """Product image derivative controller"""
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    # Pending generations, referenced so they aren't garbage collected mid-flight
+    _pending: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _get_executor() -> ProcessPoolExecutor:
+        """Process pool for derivative generation, started on first use"""
+        if ImageController._executor is None:
+            # spawn: workers must not inherit the event loop or database client threads
+            ImageController._executor = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return ImageController._executor
+
+    @staticmethod
+    def shutdown():
+        """Stop the derivative worker processes"""
+        if ImageController._executor is not None:
+            ImageController._executor.shutdown(wait=False, cancel_futures=True)
+            ImageController._executor = None
+
+    @staticmethod
+    def enqueue_variants(file_path: Path, url: str):
+        """Generate derivatives of an uploaded image in the background"""
+        task = asyncio.create_task(ImageController._generate_variants(file_path, url))
+        ImageController._pending.add(task)
+        task.add_done_callback(ImageController._pending.discard)
+
+    @staticmethod
+    async def _generate_variants(file_path: Path, url: str):
+        """Render derivatives in the process pool and record them on products using the image"""
+        loop = asyncio.get_running_loop()
+        try:
+            manifest = await loop.run_in_executor(ImageController._get_executor(), render_variants, str(file_path))
+        except Exception as e:
+            metrics.inc("image_variants_failed_total")
+            print(f"Warning: Failed to generate image variants for {url}: {e}")
+            return
+
+        metrics.inc("image_variants_generated_total")
+
+        # Products saved while the derivatives were being generated
+        collection = await get_collection("products")
+        await collection.update_many(
+            {"images": url},
+            {"$addToSet": {"image_variants": ImageController.variant_entry(url, manifest)}}
+        )
+
+    @staticmethod
+    def variant_entry(url: str, manifest: dict) -> dict:
+        """Derivative URLs of an image, as stored in a product's image_variants"""
+        prefix = url.rsplit("/", 1)[0] + "/"
+        entry = {"original": url}
+        for variant, files in manifest.items():
+            entry[variant] = {
+                key: prefix + value if key not in ("width", "height") else value
+                for key, value in files.items()
+            }
+        return entry
+
+    @staticmethod
+    async def attach_variants(product_id: str, images: Optional[List[str]]):
+        """Record the already generated derivatives of a product's images on the product"""
+        if images is None:
+            return
+
+        entries = []
+        for url in images:
+            if not url or not url.startswith(PRODUCT_IMAGE_URL):
+                continue
+            manifest = await run_in_threadpool(read_manifest, PRODUCT_IMAGE_DIR / Path(url).name)
+            if manifest:
+                entries.append(ImageController.variant_entry(url, manifest))
+
+        collection = await get_collection("products")
+        await collection.update_one(
+            {"_id": ObjectId(product_id)},
+            {"$set": {"image_variants": entries}}
+        )
+
+metrics.register_gauge("image_variants_pending", lambda: len(ImageController._pending))
@@ -2,13 +2,23 @@ from datetime import datetime
 from typing import List, Optional
 from bson import ObjectId
 from fastapi import status
+from pymongo import ReturnDocument, UpdateOne
 
-from database.connection import get_collection
-from models.order import Order, OrderCreate, DirectOrderCreate, OrderUpdate, OrderResponse, OrderSearch, OrderItem, OrderStatus
+from database.connection import get_collection, run_in_transaction
+from models.order import (
+    Order, OrderCreate, DirectOrderCreate, OrderUpdate, OrderResponse, OrderSearch, OrderItem, OrderStatus,
+    REVENUE_EXCLUDED_STATUSES
+)
 from models.tracking import OrderTracking, TrackingStatus
 from controllers.cart_controller import CartController
 from controllers.product_controller import ProductController
+from controllers.customer_controller import CustomerController
+from controllers.dashboard_controller import DashboardController
+from controllers.settings_controller import SettingsController
 from utils.response import APIException
+from utils.order_number import normalize_order_number, build_order_number_query, merge_query
+from utils.ids import customer_key, customer_match
+from utils.metrics import metrics
 
 class OrderController:
     """Order management controller"""
@@ -48,16 +58,18 @@ class OrderController:
         
         # Calculate order amounts
         subtotal = sum(item.subtotal for item in order_items)
-        tax_amount = subtotal * 0.08  # 8% tax
-        shipping_fee = 0.0 if subtotal >= 100 else 10.0  # Free shipping over $100
+        tax_amount = subtotal * SettingsController.get_number("tax_rate")
+        # Free shipping over the configured threshold
+        free_shipping = subtotal >= SettingsController.get_number("free_shipping_threshold")
+        shipping_fee = 0.0 if free_shipping else SettingsController.get_number("shipping_fee")
         total_amount = subtotal + tax_amount + shipping_fee
         
         # Generate order number
-        order_number = Order.generate_order_number()
+        order_number = normalize_order_number(Order.generate_order_number())
         
         # Create order
         order = Order(
-            customer_id=customer_id,
+            customer_id=customer_key(customer_id),
             order_number=order_number,
             items=order_items,
             shipping_address=order_data.shipping_address,
@@ -74,7 +86,9 @@ class OrderController:
         
         # Save order to database
         collection = await get_collection("orders")
-        result = await collection.insert_one(order.dict(by_alias=True, exclude={"id"}))
+        order_dict = order.dict(by_alias=True, exclude={"id"})
+        result = await collection.insert_one(order_dict)
+        await OrderController._apply_order_stats(order_dict, orders_delta=1, revenue_sign=1)
         
         # Update product stock
         for item in order_items:
@@ -112,7 +126,7 @@ class OrderController:
         
         query = {"_id": ObjectId(order_id)}
         if customer_id:
-            query["customer_id"] = customer_id
+            query["customer_id"] = customer_match(customer_id)
         
         order_doc = await collection.find_one(query)
         if not order_doc:
@@ -130,14 +144,56 @@ class OrderController:
         
         return OrderResponse(**order_doc)
     
+    @staticmethod
+    async def get_order_detail(order_id: str, customer_id: Optional[str] = None) -> dict:
+        """Get order details together with its tracking information in one aggregation"""
+        from controllers.tracking_controller import TrackingController
+        
+        if not ObjectId.is_valid(order_id):
+            raise APIException("Invalid order ID format", status.HTTP_400_BAD_REQUEST)
+        
+        collection = await get_collection("orders")
+        
+        match = {"_id": ObjectId(order_id)}
+        if customer_id:
+            match["customer_id"] = customer_match(customer_id)
+        
+        pipeline = [
+            {"$match": match},
+            # Tracking records reference orders by the string form of _id
+            {"$addFields": {"_order_id": {"$toString": "$_id"}}},
+            {
+                "$lookup": {
+                    "from": "tracking",
+                    "localField": "_order_id",
+                    "foreignField": "order_id",
+                    "as": "tracking"
+                }
+            },
+            {"$project": {"_order_id": 0}}
+        ]
+        
+        results = await collection.aggregate(pipeline).to_list(length=1)
+        if not results:
+            raise APIException("Order not found", status.HTTP_404_NOT_FOUND)
+        
+        order_doc = results[0]
+        tracking_docs = order_doc.pop("tracking", [])
+        tracking = TrackingController.to_tracking_response(tracking_docs[0]) if tracking_docs else None
+        
+        return {
+            "order": OrderController._to_order_response(order_doc).dict(),
+            "tracking": tracking.dict() if tracking else None
+        }
+    
     @staticmethod
     async def get_order_by_number(order_number: str, customer_id: Optional[str] = None) -> OrderResponse:
         """Get order by order number"""
         collection = await get_collection("orders")
         
-        query = {"order_number": order_number}
+        query = {"order_number": normalize_order_number(order_number)}
         if customer_id:
-            query["customer_id"] = customer_id
+            query["customer_id"] = customer_match(customer_id)
         
         order_doc = await collection.find_one(query)
         if not order_doc:
@@ -166,15 +222,19 @@ class OrderController:
             elif update_data.status == OrderStatus.DELIVERED:
                 update_dict["delivered_at"] = datetime.now()
         
-        # Update order
-        result = await collection.update_one(
+        # Update order, keeping the previous state for statistics
+        previous_doc = await collection.find_one_and_update(
             {"_id": ObjectId(order_id)},
-            {"$set": update_dict}
+            {"$set": update_dict},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if not previous_doc:
             raise APIException("Order not found", status.HTTP_404_NOT_FOUND)
         
+        if update_data.status:
+            await OrderController.apply_status_transition(previous_doc, update_data.status)
+        
         # Update order tracking
         if update_data.status:
             try:
@@ -199,14 +259,11 @@ class OrderController:
         query = {}
         
         if search_params.customer_id:
-            query["customer_id"] = search_params.customer_id
+            query["customer_id"] = customer_match(search_params.customer_id)
         
         if search_params.status:
             query["status"] = search_params.status
         
-        if search_params.order_number:
-            query["order_number"] = {"$regex": search_params.order_number, "$options": "i"}
-        
         if search_params.start_date or search_params.end_date:
             date_query = {}
             if search_params.start_date:
@@ -215,6 +272,15 @@ class OrderController:
                 date_query["$lte"] = search_params.end_date
             query["created_at"] = date_query
         
+        if search_params.order_number:
+            try:
+                order_number_query = build_order_number_query(
+                    search_params.order_number, search_params.order_number_mode
+                )
+            except ValueError as e:
+                raise APIException(str(e), status.HTTP_400_BAD_REQUEST)
+            merge_query(query, order_number_query)
+        
         # Build sorting conditions
         sort_direction = 1 if search_params.sort_order == "asc" else -1
         sort_field = search_params.sort_by or "created_at"
@@ -248,23 +314,89 @@ class OrderController:
     
     @staticmethod
     async def cancel_order(order_id: str, customer_id: str) -> OrderResponse:
-        """Cancel order"""
-        # Get order
-        order = await OrderController.get_order(order_id, customer_id)
+        """Cancel order - status transition, stock restore and tracking event in one transaction"""
+        from controllers.tracking_controller import TrackingController
+        
+        if not ObjectId.is_valid(order_id):
+            raise APIException("Invalid order ID format", status.HTTP_400_BAD_REQUEST)
         
-        # Check order status
-        if order.status not in [OrderStatus.PENDING, OrderStatus.PAID]:
+        collection = await get_collection("orders")
+        products_collection = await get_collection("products")
+        cancellable_statuses = [OrderStatus.PENDING.value, OrderStatus.PAID.value]
+        
+        async def _cancel(session):
+            now = datetime.now()
+            
+            # Conditional status transition, only matches cancellable orders
+            order_doc = await collection.find_one_and_update(
+                {
+                    "_id": ObjectId(order_id),
+                    "customer_id": customer_match(customer_id),
+                    "status": {"$in": cancellable_statuses}
+                },
+                {"$set": {"status": OrderStatus.CANCELLED.value, "updated_at": now}},
+                return_document=ReturnDocument.AFTER,
+                session=session
+            )
+            if not order_doc:
+                return None, None
+            
+            # Restore stock for all items in one round trip
+            stock_updates = [
+                UpdateOne(
+                    {"_id": ObjectId(item["product_id"])},
+                    {"$inc": {"stock_quantity": item["quantity"]}, "$set": {"updated_at": now}}
+                )
+                for item in order_doc.get("items", [])
+                if ObjectId.is_valid(item["product_id"])
+            ]
+            if stock_updates:
+                await products_collection.bulk_write(stock_updates, ordered=False, session=session)
+            
+            # Append tracking event (orders without tracking records are still cancelled)
+            tracking_doc = await TrackingController.append_event(
+                order_id,
+                TrackingStatus.CANCELLED,
+                f"Order status updated to: {OrderStatus.CANCELLED.value}",
+                session=session
+            )
+            
+            return order_doc, tracking_doc
+        
+        order_doc, tracking_doc = await run_in_transaction(_cancel)
+        
+        if tracking_doc:
+            TrackingController.publish_update(tracking_doc)
+        
+        if order_doc:
+            # Cancellable orders always counted towards revenue
+            await OrderController._apply_order_stats(order_doc, orders_delta=0, revenue_sign=-1)
+        else:
+            # Distinguish missing order from an order that can no longer be cancelled
+            existing = await collection.find_one(
+                {"_id": ObjectId(order_id), "customer_id": customer_match(customer_id)},
+                {"_id": 1}
+            )
+            if not existing:
+                raise APIException("Order not found", status.HTTP_404_NOT_FOUND)
             raise APIException("Order status does not allow cancellation", status.HTTP_400_BAD_REQUEST)
         
-        # Update order status
-        update_data = OrderUpdate(status=OrderStatus.CANCELLED)
-        updated_order = await OrderController.update_order_status(order_id, update_data)
+        return OrderController._to_order_response(order_doc)
+    
+    @staticmethod
+    def _to_order_response(order_doc: dict) -> OrderResponse:
+        """Convert an order document to an OrderResponse"""
+        order_doc["id"] = str(order_doc["_id"])
+        del order_doc["_id"]
         
-        # Restore stock
-        for item in order.items:
-            await ProductController.update_stock(item.product_id, item.quantity)
+        # Ensure all required fields have default values
+        order_doc.setdefault("tracking_number", None)
+        order_doc.setdefault("paid_at", None)
+        order_doc.setdefault("shipped_at", None)
+        order_doc.setdefault("delivered_at", None)
+        order_doc.setdefault("notes", None)
         
-        return updated_order
+        return OrderResponse(**order_doc)
     
     @staticmethod
     async def _create_order_tracking(order_id: str, order_number: str, customer_id: str):
@@ -274,7 +406,7 @@ class OrderController:
         tracking_data = {
             "order_id": order_id,
             "order_number": order_number,
-            "customer_id": customer_id,
+            "customer_id": customer_key(customer_id),
             "current_status": TrackingStatus.ORDER_CREATED
         }
         
@@ -328,11 +460,11 @@ class OrderController:
                 print(f"Warning: Could not validate product {order_item.product_id}, continuing with order creation")
         
         # Generate order number
-        order_number = Order.generate_order_number()
+        order_number = normalize_order_number(Order.generate_order_number())
         
         # Create order using provided data
         order = Order(
-            customer_id=customer_id,
+            customer_id=customer_key(customer_id),
             order_number=order_number,
             items=order_data.items,
             shipping_address=order_data.shipping_address,
@@ -350,7 +482,9 @@ class OrderController:
         
         # Save order to database
         collection = await get_collection("orders")
-        result = await collection.insert_one(order.dict(by_alias=True, exclude={"id"}))
+        order_dict = order.dict(by_alias=True, exclude={"id"})
+        result = await collection.insert_one(order_dict)
+        await OrderController._apply_order_stats(order_dict, orders_delta=1, revenue_sign=1)
         
         # Update product stock for valid products
         for item in order_data.items:
@@ -384,6 +518,7 @@ class OrderController:
             raise APIException("Invalid order ID format", status.HTTP_400_BAD_REQUEST)
         
         # Get order first to restore stock
+        order = None
         try:
             order = await OrderController.get_order(order_id, customer_id=None)
             
@@ -403,10 +538,17 @@ class OrderController:
         if result.deleted_count == 0:
             raise APIException("Order not found", status.HTTP_404_NOT_FOUND)
         
-        # Also delete related tracking records
+        if order:
+            order_dict = order.dict()
+            revenue_sign = 0 if order.status in REVENUE_EXCLUDED_STATUSES else -1
+            await OrderController._apply_order_stats(order_dict, orders_delta=-1, revenue_sign=revenue_sign)
+        
+        # Also delete related tracking records and their event history
         try:
             tracking_collection = await get_collection("tracking")
             await tracking_collection.delete_many({"order_id": order_id})
+            buckets_collection = await get_collection("tracking_event_buckets")
+            await buckets_collection.delete_many({"order_id": order_id})
         except Exception as e:
             print(f"Warning: Could not delete tracking records for order {order_id}: {e}")
     
@@ -426,13 +568,61 @@ class OrderController:
             "archived_at": datetime.now()
         }
         
-        result = await collection.update_one(
+        previous_doc = await collection.find_one_and_update(
             {"_id": ObjectId(order_id)},
-            {"$set": update_dict}
+            {"$set": update_dict},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if not previous_doc:
             raise APIException("Order not found", status.HTTP_404_NOT_FOUND)
         
+        await OrderController.apply_status_transition(previous_doc, OrderStatus.ARCHIVED)
+        
         # Return updated order
-        return await OrderController.get_order(order_id, customer_id=None) 
\ No newline at end of file
+        return await OrderController.get_order(order_id, customer_id=None)
+    
+    @staticmethod
+    async def apply_status_transition(previous_doc: dict, new_status: str):
+        """Update maintained statistics when an order moves in or out of the revenue-counted statuses"""
+        excluded = [s.value for s in REVENUE_EXCLUDED_STATUSES]
+        was_counted = previous_doc.get("status") not in excluded
+        is_counted = new_status not in excluded
+        
+        if was_counted != is_counted:
+            await OrderController._apply_order_stats(
+                previous_doc,
+                orders_delta=0,
+                revenue_sign=1 if is_counted else -1
+            )
+    
+    @staticmethod
+    async def _apply_order_stats(order_doc: dict, orders_delta: int, revenue_sign: int):
+        """Apply an order's contribution to maintained statistics
+        
+        orders_delta adjusts order counts (+1 created, -1 deleted), revenue_sign adds (+1)
+        or removes (-1) the order's revenue. Failures are logged and counted on /metrics,
+        a non-zero *_update_failed_total means the matching backfill job should be re-run.
+        """
+        order_id = order_doc.get("_id")
+        try:
+            await CustomerController.apply_order_stats(
+                str(order_doc["customer_id"]),
+                orders_delta,
+                revenue_sign * order_doc.get("total_amount", 0)
+            )
+        except Exception as e:
+            metrics.inc("customer_stats_update_failed_total")
+            print(f"Warning: Failed to update customer order statistics for order {order_id}: {e}")
+        
+        try:
+            await DashboardController.apply_order_sales(order_doc, orders_delta, revenue_sign)
+        except Exception as e:
+            metrics.inc("sales_daily_update_failed_total")
+            print(f"Warning: Failed to update daily sales rollup for order {order_id}: {e}")
+        
+        try:
+            await ProductController.apply_order_sales(order_doc.get("items", []), revenue_sign)
+        except Exception as e:
+            metrics.inc("product_sales_update_failed_total")
+            print(f"Warning: Failed to update product sales statistics for order {order_id}: {e}") 
\ No newline at end of file
@@ -2,9 +2,11 @@ from datetime import datetime
 from typing import List, Optional
 from bson import ObjectId
 from fastapi import status
+from pymongo import UpdateOne
 
 from database.connection import get_collection
 from models.product import Product, ProductCreate, ProductUpdate, ProductResponse, ProductSearch
+from controllers.dashboard_controller import DashboardController
 from utils.response import APIException
 
 class ProductController:
@@ -79,6 +81,7 @@ class ProductController:
             "model": product_doc.get("model", ""),
             "specifications": product_doc.get("specifications", {}),
             "images": product_doc.get("images", []),
+            "image_variants": product_doc.get("image_variants", []),
             "stock_quantity": product_doc.get("stock_quantity", 0),
             "stock": product_doc.get("stock_quantity", product_doc.get("stock", 0)),
             "is_available": product_doc.get("is_available", True),
@@ -158,8 +161,8 @@ class ProductController:
             query["price"] = price_query
         
         if search_params.in_stock_only:
-            query["stock"] = {"$gt": 0}
-            query["active"] = True
+            query["is_available"] = True
+            query["stock_quantity"] = {"$gt": 0}
         
         # Build sorting conditions
         sort_direction = 1 if search_params.sort_order == "asc" else -1
@@ -189,6 +192,7 @@ class ProductController:
                 "model": product_doc.get("model", ""),
                 "specifications": product_doc.get("specifications", {}),
                 "images": product_doc.get("images", []),
+                "image_variants": product_doc.get("image_variants", []),
                 "stock_quantity": product_doc.get("stock_quantity", 0),
                 "stock": product_doc.get("stock_quantity", product_doc.get("stock", 0)),
                 "is_available": product_doc.get("is_available", True),
@@ -207,39 +211,39 @@ class ProductController:
         """Get product category list"""
         collection = await get_collection("products")
         
-        # Get all categories
-        categories = await collection.distinct("category")
+        # Count available products in each category with one aggregation
+        results = await collection.aggregate(
+            ProductController._facet_count_pipeline("category")
+        ).to_list(length=None)
         
-        # Count products in each category
-        category_list = []
-        for category in categories:
-            count = await collection.count_documents({"category": category, "active": True})
-            category_list.append({
-                "name": category,
-                "count": count
-            })
-        
-        return category_list
+        return [{"name": result["_id"], "count": result["count"]} for result in results]
     
     @staticmethod
     async def get_brands() -> List[dict]:
         """Get brand list"""
         collection = await get_collection("products")
         
-        # Get all brands
-        brands = await collection.distinct("brand")
-        
-        # Count products for each brand
-        brand_list = []
-        for brand in brands:
-            if brand:  # Exclude null values
-                count = await collection.count_documents({"brand": brand, "active": True})
-                brand_list.append({
-                    "name": brand,
-                    "count": count
-                })
+        # Count available products for each brand with one aggregation
+        results = await collection.aggregate(
+            ProductController._facet_count_pipeline("brand")
+        ).to_list(length=None)
         
-        return brand_list
+        # Exclude null values
+        return [{"name": result["_id"], "count": result["count"]} for result in results if result["_id"]]
+    
+    @staticmethod
+    def _facet_count_pipeline(field: str) -> List[dict]:
+        """Pipeline listing every value of field with its number of available products"""
+        return [
+            # Only indexed fields are needed, so the (field, is_available, price) index covers the scan
+            {"$sort": {field: 1}},
+            {"$project": {"_id": 0, field: 1, "is_available": 1}},
+            {"$group": {
+                "_id": f"${field}",
+                "count": {"$sum": {"$cond": [{"$eq": ["$is_available", True]}, 1, 0]}}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
     
     @staticmethod
     async def update_stock(product_id: str, quantity_change: int) -> ProductResponse:
@@ -268,4 +272,26 @@ class ProductController:
             )
             raise APIException("Insufficient stock", status.HTTP_400_BAD_REQUEST)
         
-        return await ProductController.get_product(product_id) 
\ No newline at end of file
+        DashboardController.publish_stock_level(product_doc, quantity_change)
+        
+        return await ProductController.get_product(product_id)
+    
+    @staticmethod
+    async def apply_order_sales(items: List[dict], sign: int):
+        """Add (+1) or remove (-1) an order's items from product sales_count and sales_revenue"""
+        operations = [
+            UpdateOne(
+                {"_id": ObjectId(item["product_id"])},
+                {"$inc": {
+                    "sales_count": sign * item.get("quantity", 0),
+                    "sales_revenue": sign * item.get("subtotal", 0)
+                }}
+            )
+            for item in items
+            if ObjectId.is_valid(item.get("product_id"))
+        ]
+        if not operations or not sign:
+            return
+        
+        collection = await get_collection("products")
+        await collection.bulk_write(operations, ordered=False)
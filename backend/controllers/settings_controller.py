@@ -0,0 +1,112 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import Any
+from bson import ObjectId
+
+from database.connection import get_collection
+
+# Seconds between checks of the stored settings version, picks up changes made by other workers
+SETTINGS_POLL_SECONDS = float(os.getenv("SETTINGS_POLL_SECONDS", "30"))
+
+# Allowed range of the numeric pricing settings
+NUMBER_SETTING_RANGES = {
+    "tax_rate": (0.0, 1.0),
+    "free_shipping_threshold": (0.0, None),
+    "shipping_fee": (0.0, None)
+}
+
+# Settings used until an admin saves them
+DEFAULT_SETTINGS = {
+    "site_name": "AWE Electronics",
+    "site_description": "Electronics Store",
+    "contact_email": "admin@aweelectronics.com",
+    "contact_phone": "+1-234-567-8900",
+    "tax_rate": 0.08,
+    "free_shipping_threshold": 100.0,
+    "shipping_fee": 10.0
+}
+
+class SettingsController:
+    """System settings controller, serves settings from an in-process cache"""
+    
+    _settings: dict = dict(DEFAULT_SETTINGS)
+    _version: Any = None
+    
+    @staticmethod
+    def get_settings() -> dict:
+        """Current system settings (no I/O)"""
+        return dict(SettingsController._settings)
+    
+    @staticmethod
+    def get(name: str, default: Any = None) -> Any:
+        """Current value of one setting (no I/O)"""
+        return SettingsController._settings.get(name, default)
+    
+    @staticmethod
+    def get_number(name: str) -> float:
+        """Current numeric setting, the default when the stored value is invalid (no I/O)"""
+        try:
+            value = float(SettingsController._settings.get(name, DEFAULT_SETTINGS[name]))
+        except (TypeError, ValueError):
+            value = None
+        
+        # Values stored before validation existed may still be out of range
+        minimum, maximum = NUMBER_SETTING_RANGES.get(name, (None, None))
+        if value is None or value != value or (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            print(f"Warning: Invalid value for setting {name}, using default")
+            return DEFAULT_SETTINGS[name]
+        return value
+    
+    @staticmethod
+    async def load_settings() -> dict:
+        """Load the stored settings into the cache"""
+        collection = await get_collection("settings")
+        settings = await collection.find_one({"type": "system"})
+        SettingsController._apply(settings)
+        return SettingsController.get_settings()
+    
+    @staticmethod
+    async def update_settings(settings_data: dict) -> dict:
+        """Replace the stored settings and refresh the cache (write-through)"""
+        collection = await get_collection("settings")
+        
+        settings_data.pop("id", None)
+        settings_data.pop("_id", None)
+        settings_data["type"] = "system"
+        settings_data["updated_at"] = datetime.now()
+        # New version stamp, other workers reload when they see it change
+        settings_data["version"] = str(ObjectId())
+        
+        # Use upsert to update or create settings
+        await collection.replace_one(
+            {"type": "system"},
+            settings_data,
+            upsert=True
+        )
+        
+        return await SettingsController.load_settings()
+    
+    @staticmethod
+    async def watch_version():
+        """Reload settings whenever the stored version stamp changes"""
+        collection = await get_collection("settings")
+        while True:
+            await asyncio.sleep(SETTINGS_POLL_SECONDS)
+            try:
+                stamp = await collection.find_one({"type": "system"}, {"version": 1})
+                if (stamp or {}).get("version") != SettingsController._version:
+                    await SettingsController.load_settings()
+            except Exception as e:
+                print(f"Warning: Failed to refresh system settings: {e}")
+    
+    @staticmethod
+    def _apply(settings: dict):
+        """Replace the cached settings with a stored settings document"""
+        merged = dict(DEFAULT_SETTINGS)
+        if settings:
+            settings = dict(settings)
+            settings["id"] = str(settings.pop("_id"))
+            merged.update(settings)
+        SettingsController._settings = merged
+        SettingsController._version = (settings or {}).get("version")
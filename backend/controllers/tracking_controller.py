@@ -1,14 +1,53 @@
+import os
+import asyncio
 from datetime import datetime, timedelta
 from typing import List, Optional
 from bson import ObjectId
 from fastapi import status
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
-from database.connection import get_collection
+from database.connection import get_collection, run_in_transaction
 from models.tracking import (
     OrderTracking, OrderTrackingResponse, TrackingUpdate, TrackingSearch,
-    TrackingStatus, TrackingEvent, TrackingSummary, DeliveryEstimate
+    TrackingStatus, TrackingEvent, TrackingEventResponse, TrackingSummary, DeliveryEstimate,
+    BatchDeliveryEstimate, CarrierEvent
 )
 from utils.response import APIException
+from utils.order_number import normalize_order_number, build_order_number_query, merge_query
+from utils.event_bus import event_bus
+from utils.ids import customer_key, customer_match
+from utils.tracking_status import (
+    TERMINAL_STATUSES, delivery_estimate, progress_percentage, remaining_delivery,
+    batch_delivery_estimates, batch_progress_percentages, annotate_delivery_estimates
+)
+
+# Number of most recent events embedded in the tracking document
+TRACKING_EMBEDDED_EVENTS = int(os.getenv("TRACKING_EMBEDDED_EVENTS", "20"))
+# Maximum number of events stored per history bucket document
+TRACKING_BUCKET_SIZE = int(os.getenv("TRACKING_BUCKET_SIZE", "100"))
+# Publish tracking updates from a MongoDB change stream (shared across workers) instead of in-process writes
+TRACKING_CHANGE_STREAM = os.getenv("TRACKING_CHANGE_STREAM", "False").lower() == "true"
+
+# Fields needed to build a TrackingSummary
+TRACKING_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "order_number": 1,
+    "current_status": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
+# Fields returned by tracking writes, enough to publish an update
+TRACKING_UPDATE_PROJECTION = {
+    "order_id": 1,
+    "order_number": 1,
+    "customer_id": 1,
+    "current_status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "events": {"$slice": -1}
+}
 
 class TrackingController:
     """Order tracking controller"""
@@ -19,25 +58,28 @@ class TrackingController:
         collection = await get_collection("tracking")
         
         # Create initial tracking event
-        initial_event = TrackingEvent(
-            status=TrackingStatus.ORDER_CREATED,
-            timestamp=datetime.now(),
-            description="Order has been created",
-            location="Online Store"
+        initial_event = TrackingController._build_event(
+            TrackingStatus.ORDER_CREATED,
+            "Order has been created",
+            "Online Store"
         )
         
         tracking = OrderTracking(
             order_id=tracking_data["order_id"],
-            order_number=tracking_data["order_number"],
-            customer_id=tracking_data["customer_id"],
+            order_number=normalize_order_number(tracking_data["order_number"]),
+            customer_id=customer_key(tracking_data["customer_id"]),
             current_status=TrackingStatus.ORDER_CREATED,
-            events=[initial_event],
+            event_count=1,
             created_at=datetime.now(),
             updated_at=datetime.now()
         )
+        tracking_dict = tracking.dict(by_alias=True, exclude={"id"})
+        tracking_dict["events"] = [initial_event]
+        tracking_dict["last_event_at"] = initial_event["timestamp"]
         
         # Insert into database
-        result = await collection.insert_one(tracking.dict(by_alias=True, exclude={"id"}))
+        result = await collection.insert_one(tracking_dict)
+        await TrackingController._store_events_in_bucket(tracking_data["order_id"], [initial_event], 0)
         
         # Return created tracking record
         tracking_doc = await collection.find_one({"_id": result.inserted_id})
@@ -55,15 +97,19 @@ class TrackingController:
         if not tracking_doc:
             raise APIException("Tracking information not found", status.HTTP_404_NOT_FOUND)
         
+        return TrackingController.to_tracking_response(tracking_doc)
+    
+    @staticmethod
+    def to_tracking_response(tracking_doc: dict) -> OrderTrackingResponse:
+        """Convert a tracking document to an OrderTrackingResponse with its delivery estimate"""
         tracking_doc["id"] = str(tracking_doc["_id"])
         del tracking_doc["_id"]
         
         # Add estimated delivery time
-        estimated_delivery = TrackingController._calculate_delivery_estimate(
-            tracking_doc["current_status"], 
+        tracking_doc["estimated_delivery"] = delivery_estimate(
+            tracking_doc["current_status"],
             tracking_doc["created_at"]
         )
-        tracking_doc["estimated_delivery"] = estimated_delivery
         
         return OrderTrackingResponse(**tracking_doc)
     
@@ -72,21 +118,11 @@ class TrackingController:
         """Get tracking information by order number"""
         collection = await get_collection("tracking")
         
-        tracking_doc = await collection.find_one({"order_number": order_number})
+        tracking_doc = await collection.find_one({"order_number": normalize_order_number(order_number)})
         if not tracking_doc:
             raise APIException("Tracking information not found", status.HTTP_404_NOT_FOUND)
         
-        tracking_doc["id"] = str(tracking_doc["_id"])
-        del tracking_doc["_id"]
-        
-        # Add estimated delivery time
-        estimated_delivery = TrackingController._calculate_delivery_estimate(
-            tracking_doc["current_status"], 
-            tracking_doc["created_at"]
-        )
-        tracking_doc["estimated_delivery"] = estimated_delivery
-        
-        return OrderTrackingResponse(**tracking_doc)
+        return TrackingController.to_tracking_response(tracking_doc)
     
     @staticmethod
     async def get_tracking_by_tracking_number(tracking_number: str) -> OrderTrackingResponse:
@@ -112,19 +148,46 @@ class TrackingController:
         tracking_number: Optional[str] = None
     ) -> OrderTrackingResponse:
         """Update order tracking status"""
+        tracking_doc = await TrackingController.append_event(
+            order_id,
+            status,
+            description,
+            location=location,
+            tracking_number=tracking_number
+        )
+        
+        if not tracking_doc:
+            raise APIException("Tracking record not found", 404)
+        
+        TrackingController.publish_update(tracking_doc)
+        
+        return await TrackingController.get_tracking_by_order_id(order_id)
+    
+    @staticmethod
+    async def append_event(
+        order_id: str,
+        status: TrackingStatus,
+        description: str,
+        location: Optional[str] = None,
+        tracking_number: Optional[str] = None,
+        session=None
+    ) -> Optional[dict]:
+        """Append a tracking event and set the current status
+        
+        Only the most recent TRACKING_EMBEDDED_EVENTS events stay embedded in the tracking
+        document, the full history is kept in tracking_event_buckets. Returns the updated
+        record (TRACKING_UPDATE_PROJECTION fields) or None if no tracking record exists.
+        """
         collection = await get_collection("tracking")
         
         # Create new tracking event
-        new_event = TrackingEvent(
-            status=status,
-            timestamp=datetime.now(),
-            description=description,
-            location=location or "AWE Warehouse"
-        )
+        new_event = TrackingController._build_event(status, description, location or "AWE Warehouse")
         
         # Update fields
         update_data = {
-            "$push": {"events": new_event.dict()},
+            "$push": {"events": {"$each": [new_event], "$slice": -TRACKING_EMBEDDED_EVENTS}},
+            "$inc": {"event_count": 1},
+            "$max": {"last_event_at": new_event["timestamp"]},
             "$set": {
                 "current_status": status,
                 "updated_at": datetime.now()
@@ -135,16 +198,423 @@ class TrackingController:
         if tracking_number:
             update_data["$set"]["tracking_number"] = tracking_number
         
-        # Update tracking record
-        result = await collection.update_one(
-            {"order_id": order_id},
-            update_data
+        # Update tracking record (records created before bucketing are migrated first)
+        tracking_doc = await collection.find_one_and_update(
+            {"order_id": order_id, "event_count": {"$exists": True}},
+            update_data,
+            projection=TRACKING_UPDATE_PROJECTION | {"event_count": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session
         )
+        if not tracking_doc:
+            if not await TrackingController._migrate_legacy_events(order_id, session=session):
+                return None
+            tracking_doc = await collection.find_one_and_update(
+                {"order_id": order_id},
+                update_data,
+                projection=TRACKING_UPDATE_PROJECTION | {"event_count": 1},
+                return_document=ReturnDocument.AFTER,
+                session=session
+            )
         
-        if result.matched_count == 0:
-            raise APIException("Tracking record not found", status.HTTP_404_NOT_FOUND)
+        # The incremented event_count is the new event's position in the order's history
+        await TrackingController._store_events_in_bucket(
+            order_id, [new_event], tracking_doc["event_count"] - 1, session=session
+        )
         
-        return await TrackingController.get_tracking_by_order_id(order_id)
+        return tracking_doc
+    
+    @staticmethod
+    async def ingest_carrier_events(events: List[CarrierEvent]) -> dict:
+        """Apply a batch of carrier events with unordered bulk writes, returning per-item outcomes"""
+        collection = await get_collection("tracking")
+        results = [{"index": i, "status": None} for i in range(len(events))]
+        
+        # Resolve tracking numbers to order IDs with one query
+        tracking_numbers = list({event.tracking_number for event in events if not event.order_id and event.tracking_number})
+        order_ids_by_tracking_number = {}
+        if tracking_numbers:
+            cursor = collection.find(
+                {"tracking_number": {"$in": tracking_numbers}},
+                {"_id": 0, "order_id": 1, "tracking_number": 1}
+            )
+            async for doc in cursor:
+                order_ids_by_tracking_number[doc["tracking_number"]] = doc["order_id"]
+        
+        # De-duplicate and group events per order
+        seen = set()
+        groups = {}
+        event_keys = {}
+        for i, event in enumerate(events):
+            order_id = event.order_id or order_ids_by_tracking_number.get(event.tracking_number)
+            if not order_id:
+                results[i]["status"] = "not_found"
+                continue
+            
+            event_keys[i] = TrackingController._carrier_event_key(event)
+            if (order_id, event_keys[i]) in seen:
+                results[i]["status"] = "duplicate"
+                continue
+            seen.add((order_id, event_keys[i]))
+            
+            results[i]["order_id"] = order_id
+            groups.setdefault(order_id, []).append(i)
+        
+        # Check which orders have tracking records, migrating pre-bucketing records first
+        existing = {}
+        if groups:
+            cursor = collection.find({"order_id": {"$in": list(groups)}}, TRACKING_UPDATE_PROJECTION | {"event_count": 1})
+            async for doc in cursor:
+                if "event_count" not in doc:
+                    await TrackingController._migrate_legacy_events(doc["order_id"])
+                existing[doc["order_id"]] = doc
+        
+        # Events already stored by an earlier delivery (carriers retry whole batches)
+        stored_keys = set()
+        if existing:
+            batch_keys = list({event_keys[i] for order_id in existing for i in groups[order_id]})
+            buckets = await get_collection("tracking_event_buckets")
+            pipeline = [
+                {"$match": {"order_id": {"$in": list(existing)}, "events.key": {"$in": batch_keys}}},
+                {"$unwind": "$events"},
+                {"$match": {"events.key": {"$in": batch_keys}}},
+                {"$project": {"_id": 0, "order_id": 1, "key": "$events.key"}}
+            ]
+            async for doc in buckets.aggregate(pipeline):
+                stored_keys.add((doc["order_id"], doc["key"]))
+        
+        updates = {}
+        now = datetime.now()
+        for order_id, indexes in groups.items():
+            if order_id not in existing:
+                for i in indexes:
+                    results[i]["status"] = "not_found"
+                continue
+            
+            for i in indexes:
+                if (order_id, event_keys[i]) in stored_keys:
+                    results[i]["status"] = "duplicate"
+            indexes = [i for i in indexes if (order_id, event_keys[i]) not in stored_keys]
+            if not indexes:
+                continue
+            groups[order_id] = indexes
+            
+            indexes.sort(key=lambda i: events[i].timestamp)
+            event_docs = []
+            for i in indexes:
+                event_doc = TrackingController._build_event(
+                    events[i].status,
+                    events[i].description or f"Carrier update: {events[i].status.value}",
+                    events[i].location,
+                    timestamp=events[i].timestamp
+                )
+                event_doc["key"] = event_keys[i]
+                event_docs.append(event_doc)
+            latest = events[indexes[-1]]
+            
+            update_data = {
+                "$push": {
+                    "events": {
+                        "$each": event_docs,
+                        "$sort": {"timestamp": 1},
+                        "$slice": -TRACKING_EMBEDDED_EVENTS
+                    }
+                },
+                "$inc": {"event_count": len(event_docs)},
+                "$max": {"last_event_at": latest.timestamp},
+                "$set": {"updated_at": now}
+            }
+            tracking_number = next((events[i].tracking_number for i in reversed(indexes) if events[i].tracking_number), None)
+            if tracking_number:
+                update_data["$set"]["tracking_number"] = tracking_number
+            
+            updates[order_id] = (update_data, event_docs, latest)
+        
+        order_ids = list(updates)
+        failed_orders = set()
+        if order_ids:
+            try:
+                await collection.bulk_write(
+                    [UpdateOne({"order_id": order_id}, updates[order_id][0]) for order_id in order_ids],
+                    ordered=False
+                )
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed_orders.add(order_ids[error["index"]])
+        
+        applied = [order_id for order_id in order_ids if order_id not in failed_orders]
+        if applied:
+            # last_event_at was raised with $max, it still equals the batch's latest timestamp
+            # only when no newer event is stored, so late older events leave the status alone
+            try:
+                await collection.bulk_write(
+                    [
+                        UpdateOne(
+                            {"order_id": order_id, "last_event_at": updates[order_id][2].timestamp},
+                            {"$set": {"current_status": updates[order_id][2].status}}
+                        )
+                        for order_id in applied
+                    ],
+                    ordered=False
+                )
+            except BulkWriteError as e:
+                print(f"Warning: Failed to update tracking status for {len(e.details.get('writeErrors', []))} orders: {e}")
+            
+            # Read back what subscribers and bucket placement need
+            updated_docs = {}
+            cursor = collection.find({"order_id": {"$in": applied}}, TRACKING_UPDATE_PROJECTION | {"event_count": 1})
+            async for doc in cursor:
+                updated_docs[doc["order_id"]] = doc
+            
+            bucket_operations = []
+            for order_id in applied:
+                if order_id not in updated_docs:
+                    failed_orders.add(order_id)
+                    continue
+                existing[order_id] = updated_docs[order_id]
+                event_docs = updates[order_id][1]
+                # An append to the same order between the write and the read back shifts these
+                # positions by a few events, which only changes how full adjacent buckets get
+                bucket_operations.extend(TrackingController._bucket_operations(
+                    order_id, event_docs, updated_docs[order_id]["event_count"] - len(event_docs)
+                ))
+            if bucket_operations:
+                await TrackingController._write_bucket_operations(bucket_operations)
+        
+        for order_id in updates:
+            failed = order_id in failed_orders
+            for i in groups[order_id]:
+                results[i]["status"] = "error" if failed else "applied"
+            if not failed:
+                TrackingController.publish_update(existing[order_id])
+        
+        summary = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        
+        return {
+            "applied": summary.get("applied", 0),
+            "duplicate": summary.get("duplicate", 0),
+            "not_found": summary.get("not_found", 0),
+            "error": summary.get("error", 0),
+            "results": results
+        }
+    
+    @staticmethod
+    def _carrier_event_key(event: CarrierEvent) -> str:
+        """Identity of a carrier event within its order, used to skip redelivered events"""
+        return f"{event.status.value}|{event.timestamp.isoformat()}|{event.location}"
+    
+    @staticmethod
+    def publish_update(tracking_doc: dict):
+        """Publish a tracking update to the customer's subscribers (no-op when the change stream publishes)"""
+        if TRACKING_CHANGE_STREAM:
+            return
+        TrackingController._publish(tracking_doc)
+    
+    @staticmethod
+    def _publish(tracking_doc: dict):
+        """Publish a tracking update to the customer's tracking topic
+        
+        Best effort: called after the write has been applied, so a malformed record
+        (e.g. an invalid legacy customer_id) is logged instead of failing the request.
+        """
+        customer_id = tracking_doc.get("customer_id")
+        if not customer_id:
+            return
+        
+        try:
+            events = tracking_doc.get("events") or []
+            event_bus.publish(
+                f"tracking:{customer_key(customer_id)}",
+                "tracking_update",
+                {
+                    "order_id": tracking_doc["order_id"],
+                    "order_number": tracking_doc["order_number"],
+                    "current_status": tracking_doc["current_status"],
+                    "last_update": tracking_doc["updated_at"],
+                    "estimated_delivery": delivery_estimate(
+                        tracking_doc["current_status"],
+                        tracking_doc["created_at"]
+                    ),
+                    "progress_percentage": progress_percentage(tracking_doc["current_status"]),
+                    "latest_event": events[-1] if events else None
+                }
+            )
+        except Exception as e:
+            print(f"Warning: Failed to publish tracking update for order {tracking_doc.get('order_id')}: {e}")
+    
+    @staticmethod
+    async def watch_changes():
+        """Publish tracking updates from a MongoDB change stream (requires a replica set)"""
+        collection = await get_collection("tracking")
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        
+        while True:
+            try:
+                async with collection.watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        tracking_doc = change.get("fullDocument")
+                        if tracking_doc:
+                            TrackingController._publish(tracking_doc)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: Tracking change stream interrupted: {e}")
+                await asyncio.sleep(5)
+    
+    @staticmethod
+    def _build_event(status: TrackingStatus, description: str, location: str, timestamp: Optional[datetime] = None) -> dict:
+        """Build a tracking event document"""
+        event = TrackingEvent(
+            status=status,
+            timestamp=timestamp or datetime.now(),
+            description=description,
+            location=location
+        ).dict()
+        event["id"] = str(ObjectId())
+        return event
+    
+    @staticmethod
+    def _bucket_operations(order_id: str, events: List[dict], first_seq: int) -> List[UpdateOne]:
+        """Upserts appending events to the history buckets their sequence numbers fall into
+        
+        Event n of an order's history (0-based, derived from the tracking record's event_count)
+        is stored in bucket n // TRACKING_BUCKET_SIZE, so concurrent writers agree on the bucket.
+        """
+        chunks = {}
+        for offset, event in enumerate(events):
+            chunks.setdefault((first_seq + offset) // TRACKING_BUCKET_SIZE, []).append(event)
+        
+        return [
+            UpdateOne(
+                {"order_id": order_id, "seq": seq},
+                {
+                    "$push": {"events": {"$each": chunk}},
+                    "$inc": {"count": len(chunk)},
+                    "$setOnInsert": {"created_at": datetime.now()}
+                },
+                upsert=True
+            )
+            for seq, chunk in chunks.items()
+        ]
+    
+    @staticmethod
+    async def _write_bucket_operations(operations: List[UpdateOne], session=None):
+        """Apply history bucket upserts"""
+        buckets = await get_collection("tracking_event_buckets")
+        try:
+            await buckets.bulk_write(operations, ordered=False, session=session)
+        except BulkWriteError as e:
+            # Two writers opening the same bucket: the losing upsert is retried as an update
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in errors):
+                raise
+            await buckets.bulk_write([operations[error["index"]] for error in errors], ordered=False, session=session)
+    
+    @staticmethod
+    async def _store_events_in_bucket(order_id: str, events: List[dict], first_seq: int, session=None):
+        """Append events, starting at position first_seq of the order's history, to its history buckets"""
+        await TrackingController._write_bucket_operations(
+            TrackingController._bucket_operations(order_id, events, first_seq),
+            session=session
+        )
+    
+    @staticmethod
+    async def _migrate_legacy_events(order_id: str, session=None) -> bool:
+        """Move the unbounded events array of a pre-bucketing tracking record into history buckets
+        
+        The record is claimed with a conditional update before any bucket is written, so
+        concurrent migrations of the same record store its history once. Claim and bucket
+        writes share a transaction where the deployment supports them.
+        """
+        collection = await get_collection("tracking")
+        
+        async def _migrate(session):
+            tracking_doc = await collection.find_one(
+                {"order_id": order_id},
+                {"events": 1, "event_count": 1},
+                session=session
+            )
+            if not tracking_doc:
+                return False
+            if "event_count" in tracking_doc:
+                return True
+            
+            events = tracking_doc.get("events", [])
+            for event in events:
+                if not event.get("id"):
+                    event["id"] = str(ObjectId())
+            
+            result = await collection.update_one(
+                {"order_id": order_id, "event_count": {"$exists": False}},
+                {"$set": {"events": events[-TRACKING_EMBEDDED_EVENTS:], "event_count": len(events)}},
+                session=session
+            )
+            # Claimed by a concurrent migration, which writes the buckets
+            if result.modified_count == 0:
+                return True
+            
+            if events:
+                await TrackingController._store_events_in_bucket(order_id, events, 0, session=session)
+            return True
+        
+        if session is not None:
+            return await _migrate(session)
+        return await run_in_transaction(_migrate)
+    
+    @staticmethod
+    async def get_tracking_events(order_id: str, page: int = 1, size: int = 20) -> tuple[List[TrackingEventResponse], int]:
+        """Get paginated tracking event history, newest first"""
+        collection = await get_collection("tracking")
+        
+        tracking_doc = await collection.find_one({"order_id": order_id}, {"event_count": 1, "events": 1})
+        if not tracking_doc:
+            raise APIException("Tracking information not found", status.HTTP_404_NOT_FOUND)
+        
+        skip = (page - 1) * size
+        
+        if "event_count" not in tracking_doc:
+            # Record created before bucketing, whole history is embedded
+            events = sorted(tracking_doc.get("events", []), key=lambda e: e["timestamp"], reverse=True)
+            total = len(events)
+            events = events[skip:skip + size]
+        else:
+            total = tracking_doc["event_count"]
+            
+            # Serve the first page from the embedded recent events when they cover it
+            embedded = sorted(tracking_doc.get("events", []), key=lambda e: e["timestamp"], reverse=True)
+            if skip + size <= len(embedded) or len(embedded) >= total:
+                events = embedded[skip:skip + size]
+            elif skip >= total:
+                events = []
+            else:
+                # Newest first, the page holds history positions first..last, and position n
+                # is stored in bucket n // TRACKING_BUCKET_SIZE: read only those buckets
+                first = max(total - skip - size, 0)
+                last = total - skip - 1
+                buckets = await get_collection("tracking_event_buckets")
+                cursor = buckets.find(
+                    {
+                        "order_id": order_id,
+                        "seq": {"$gte": first // TRACKING_BUCKET_SIZE, "$lte": last // TRACKING_BUCKET_SIZE}
+                    },
+                    {"_id": 0, "events": 1}
+                ).sort("seq", -1)
+                bucket_events = [event async for bucket in cursor for event in bucket["events"]]
+                bucket_events.sort(key=lambda e: e["timestamp"], reverse=True)
+                
+                # Events newer than the buckets read sit in the buckets after them
+                newer = max(total - (last // TRACKING_BUCKET_SIZE + 1) * TRACKING_BUCKET_SIZE, 0)
+                events = bucket_events[skip - newer:skip - newer + size]
+        
+        event_responses = []
+        for event in events:
+            event["id"] = str(event.get("id") or event.get("_id") or "")
+            event.pop("_id", None)
+            event_responses.append(TrackingEventResponse(**event))
+        
+        return event_responses, total
     
     @staticmethod
     async def search_tracking(
@@ -158,18 +628,24 @@ class TrackingController:
         # Build query conditions
         query = {}
         
-        if search_params.order_number:
-            query["order_number"] = {"$regex": search_params.order_number, "$options": "i"}
-        
         if search_params.tracking_number:
             query["tracking_number"] = search_params.tracking_number
         
         if search_params.customer_id:
-            query["customer_id"] = search_params.customer_id
+            query["customer_id"] = customer_match(search_params.customer_id)
         
         if search_params.status:
             query["current_status"] = search_params.status
         
+        if search_params.order_number:
+            try:
+                order_number_query = build_order_number_query(
+                    search_params.order_number, search_params.order_number_mode
+                )
+            except ValueError as e:
+                raise APIException(str(e), status.HTTP_400_BAD_REQUEST)
+            merge_query(query, order_number_query)
+        
         # Calculate pagination parameters
         skip = (page - 1) * size
         
@@ -180,43 +656,48 @@ class TrackingController:
         # Calculate total
         total = await collection.count_documents(query)
         
+        # Add estimated delivery times for the whole page
+        annotate_delivery_estimates(tracking_records)
+        
         # Convert to response format
         tracking_responses = []
         for tracking_doc in tracking_records:
             tracking_doc["id"] = str(tracking_doc["_id"])
             del tracking_doc["_id"]
             
-            # Add estimated delivery time
-            estimated_delivery = TrackingController._calculate_delivery_estimate(
-                tracking_doc["current_status"], 
-                tracking_doc["created_at"]
-            )
-            tracking_doc["estimated_delivery"] = estimated_delivery
-            
             tracking_responses.append(OrderTrackingResponse(**tracking_doc))
         
         return tracking_responses, total
     
     @staticmethod
-    async def get_tracking_summary(customer_id: str) -> List[TrackingSummary]:
+    async def get_tracking_summary(
+        customer_id: str,
+        page: int = 1,
+        size: int = 20,
+        active_only: bool = False
+    ) -> tuple[List[TrackingSummary], int]:
         """Get user's order tracking summary"""
         collection = await get_collection("tracking")
         
-        # Query user's all tracking records
-        cursor = collection.find({"customer_id": customer_id}).sort("updated_at", -1)
-        tracking_records = await cursor.to_list(length=None)
+        query = {"customer_id": customer_match(customer_id)}
+        if active_only:
+            query["current_status"] = {"$nin": [s.value for s in TERMINAL_STATUSES]}
+        
+        # Query a page of the user's tracking records, summary fields only
+        skip = (page - 1) * size
+        cursor = collection.find(query, TRACKING_SUMMARY_PROJECTION).sort("updated_at", -1).skip(skip).limit(size)
+        tracking_records = await cursor.to_list(length=size)
+        
+        # Calculate total
+        total = await collection.count_documents(query)
+        
+        # Calculate progress and estimated delivery for the whole page
+        statuses = [doc["current_status"] for doc in tracking_records]
+        progresses = batch_progress_percentages(statuses)
+        estimates = batch_delivery_estimates(statuses, [doc["created_at"] for doc in tracking_records])
         
         summaries = []
-        for tracking_doc in tracking_records:
-            # Calculate progress percentage
-            progress = TrackingController._calculate_progress_percentage(tracking_doc["current_status"])
-            
-            # Calculate estimated delivery time
-            estimated_delivery = TrackingController._calculate_delivery_estimate(
-                tracking_doc["current_status"], 
-                tracking_doc["created_at"]
-            )
-            
+        for tracking_doc, progress, estimated_delivery in zip(tracking_records, progresses, estimates):
             summary = TrackingSummary(
                 order_number=tracking_doc["order_number"],
                 current_status=tracking_doc["current_status"],
@@ -226,78 +707,59 @@ class TrackingController:
             )
             summaries.append(summary)
         
-        return summaries
+        return summaries, total
     
     @staticmethod
-    def _calculate_delivery_estimate(status: TrackingStatus, created_at: datetime) -> Optional[datetime]:
-        """Calculate estimated delivery time"""
-        # Calculate estimated delivery time based on order status
-        status_days = {
-            TrackingStatus.ORDER_CREATED: 7,
-            TrackingStatus.PAYMENT_RECEIVED: 6,
-            TrackingStatus.ORDER_CONFIRMED: 5,
-            TrackingStatus.PROCESSING: 4,
-            TrackingStatus.PACKED: 3,
-            TrackingStatus.SHIPPED: 2,
-            TrackingStatus.IN_TRANSIT: 1,
-            TrackingStatus.OUT_FOR_DELIVERY: 0.5,
-        }
+    async def get_delivery_estimate(order_number: str) -> DeliveryEstimate:
+        """Get delivery estimate information"""
+        collection = await get_collection("tracking")
         
-        if status in status_days:
-            return created_at + timedelta(days=status_days[status])
-        elif status in [TrackingStatus.DELIVERED, TrackingStatus.CANCELLED, TrackingStatus.REFUNDED]:
-            return None
-        else:
-            return created_at + timedelta(days=7)  # Default 7 days
-    
-    @staticmethod
-    def _calculate_progress_percentage(status: TrackingStatus) -> int:
-        """Calculate delivery progress percentage"""
-        progress_map = {
-            TrackingStatus.ORDER_CREATED: 10,
-            TrackingStatus.PAYMENT_RECEIVED: 20,
-            TrackingStatus.ORDER_CONFIRMED: 30,
-            TrackingStatus.PROCESSING: 40,
-            TrackingStatus.PACKED: 50,
-            TrackingStatus.SHIPPED: 60,
-            TrackingStatus.IN_TRANSIT: 80,
-            TrackingStatus.OUT_FOR_DELIVERY: 90,
-            TrackingStatus.DELIVERED: 100,
-            TrackingStatus.CANCELLED: 0,
-            TrackingStatus.REFUNDED: 0,
-        }
+        tracking_doc = await collection.find_one(
+            {"order_number": normalize_order_number(order_number)},
+            {"_id": 0, "current_status": 1}
+        )
+        if not tracking_doc:
+            raise APIException("Tracking information not found", status.HTTP_404_NOT_FOUND)
         
-        return progress_map.get(status, 0)
+        return TrackingController._build_delivery_estimate(tracking_doc["current_status"], datetime.now())
     
     @staticmethod
-    async def get_delivery_estimate(order_number: str) -> DeliveryEstimate:
-        """Get delivery estimate information"""
-        tracking = await TrackingController.get_tracking_by_number(order_number)
-        
-        # Calculate estimated delivery based on current status
-        status_days = {
-            TrackingStatus.ORDER_CREATED: 7,
-            TrackingStatus.PAYMENT_RECEIVED: 6,
-            TrackingStatus.ORDER_CONFIRMED: 5,
-            TrackingStatus.PROCESSING: 4,
-            TrackingStatus.PACKED: 3,
-            TrackingStatus.SHIPPED: 2,
-            TrackingStatus.IN_TRANSIT: 1,
-            TrackingStatus.OUT_FOR_DELIVERY: 0.5,
-        }
+    async def get_delivery_estimates(order_numbers: List[str]) -> dict:
+        """Get delivery estimates for many orders with a single query"""
+        collection = await get_collection("tracking")
         
-        estimated_days = status_days.get(tracking.current_status, 7)
-        estimated_date = datetime.now() + timedelta(days=estimated_days)
+        # Normalize and de-duplicate while keeping request order
+        normalized_numbers = list(dict.fromkeys(normalize_order_number(number) for number in order_numbers))
         
-        # Determine shipping method
-        shipping_method = "Standard Shipping"
-        if estimated_days <= 1:
-            shipping_method = "Express Shipping"
-        elif estimated_days <= 3:
-            shipping_method = "Fast Shipping"
+        cursor = collection.find(
+            {"order_number": {"$in": normalized_numbers}},
+            {"_id": 0, "order_number": 1, "current_status": 1}
+        )
+        tracking_records = await cursor.to_list(length=len(normalized_numbers))
+        statuses = {doc["order_number"]: doc["current_status"] for doc in tracking_records}
+        
+        now = datetime.now()
+        estimates = []
+        not_found = []
+        for order_number in normalized_numbers:
+            if order_number not in statuses:
+                not_found.append(order_number)
+                continue
+            estimate = TrackingController._build_delivery_estimate(statuses[order_number], now)
+            estimates.append(BatchDeliveryEstimate(order_number=order_number, **estimate.dict()))
+        
+        return {
+            "estimates": [estimate.dict() for estimate in estimates],
+            "not_found": not_found
+        }
+    
+    @staticmethod
+    def _build_delivery_estimate(current_status: TrackingStatus, now: datetime) -> DeliveryEstimate:
+        """Build a delivery estimate relative to now from the precomputed status table"""
+        estimated_days, method = remaining_delivery(current_status)
         
         return DeliveryEstimate(
             estimated_days=int(estimated_days),
-            estimated_delivery_date=estimated_date,
-            shipping_method=shipping_method
-        ) 
\ No newline at end of file
+            estimated_delivery_date=now + timedelta(days=estimated_days),
+            shipping_method=method
+        )
@@ -1,6 +1,7 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
+from pymongo.errors import OperationFailure
 from typing import Optional
 import ssl
 import certifi
@@ -69,4 +70,19 @@ async def test_connection():
         return True
     except Exception as e:
         print(f"Connection test failed: {e}")
-        return False 
\ No newline at end of file
+        return False
+
+async def run_in_transaction(callback):
+    """Run callback(session) inside a transaction.
+
+    Falls back to running without a session on deployments that don't
+    support transactions (standalone MongoDB servers).
+    """
+    async with await db.client.start_session() as session:
+        try:
+            return await session.with_transaction(callback)
+        except OperationFailure as e:
+            # IllegalOperation: transactions require a replica set or mongos
+            if e.code != 20:
+                raise
+    return await callback(None)
@@ -0,0 +1,50 @@
+from pymongo import ASCENDING, DESCENDING
+
+from database.connection import get_collection
+
+# Index definitions per collection: (keys, options)
+INDEXES = {
+    "orders": [
+        ([("order_number", ASCENDING)], {"name": "order_number"}),
+        ([("created_at", DESCENDING)], {"name": "created_at_desc"}),
+        ([("customer_id", ASCENDING), ("created_at", DESCENDING)], {"name": "customer_id_created_at"}),
+    ],
+    "products": [
+        ([("category", ASCENDING), ("is_available", ASCENDING), ("price", ASCENDING)], {"name": "category_available_price"}),
+        ([("brand", ASCENDING), ("is_available", ASCENDING), ("price", ASCENDING)], {"name": "brand_available_price"}),
+        ([("is_available", ASCENDING), ("stock_quantity", ASCENDING)], {"name": "available_stock"}),
+        ([("created_at", DESCENDING)], {"name": "created_at_desc"}),
+        ([("sales_count", DESCENDING)], {"name": "sales_count_desc"}),
+    ],
+    "cart_items": [
+        ([("customer_id", ASCENDING), ("product_id", ASCENDING)], {"name": "customer_id_product_id"}),
+    ],
+    "customers": [
+        ([("created_at", DESCENDING)], {"name": "created_at_desc"}),
+        ([("total_spent", DESCENDING)], {"name": "total_spent_desc"}),
+        ([("username_lc", ASCENDING)], {"name": "username_lc"}),
+        ([("email_lc", ASCENDING)], {"name": "email_lc"}),
+        ([("email_domain", ASCENDING)], {"name": "email_domain"}),
+        ([("search_tokens", ASCENDING)], {"name": "search_tokens"}),
+    ],
+    "tracking": [
+        ([("order_number", ASCENDING)], {"name": "order_number"}),
+        ([("order_id", ASCENDING)], {"name": "order_id"}),
+        ([("customer_id", ASCENDING), ("updated_at", DESCENDING)], {"name": "customer_id_updated_at"}),
+        ([("tracking_number", ASCENDING)], {"name": "tracking_number"}),
+    ],
+    "tracking_event_buckets": [
+        ([("order_id", ASCENDING), ("seq", ASCENDING)], {"name": "order_id_seq", "unique": True}),
+    ],
+}
+
+async def ensure_indexes():
+    """Create database indexes used by the API (idempotent)"""
+    for collection_name, indexes in INDEXES.items():
+        collection = await get_collection(collection_name)
+        for keys, options in indexes:
+            try:
+                await collection.create_index(keys, **options)
+            except Exception as e:
+                # Don't block startup on index build conflicts (e.g. legacy duplicates)
+                print(f"⚠️ Failed to create index {options.get('name')} on {collection_name}: {e}")
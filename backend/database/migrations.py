@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# Default number of documents rewritten per bulk write
+MIGRATION_BATCH_SIZE = 500
+# Default pause between batches so online traffic keeps priority
+MIGRATION_PAUSE_SECONDS = 0.1
+
+async def migrate_in_batches(
+    collection,
+    query: dict,
+    build_operation: Callable[[dict], Optional[object]],
+    projection: Optional[dict] = None,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    pause_seconds: float = MIGRATION_PAUSE_SECONDS
+) -> int:
+    """Rewrite documents matching query in _id-ordered chunks, returns the number of modified documents
+
+    build_operation turns a document into a pymongo write operation (or None to skip it).
+    Chunks are walked by _id, so the migration can be interrupted and re-run safely.
+    """
+    modified = 0
+    last_id = None
+
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+
+        cursor = collection.find(batch_query, projection).sort("_id", 1).limit(batch_size)
+        docs = await cursor.to_list(length=batch_size)
+        if not docs:
+            break
+
+        operations = [operation for operation in map(build_operation, docs) if operation is not None]
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            modified += result.modified_count
+
+        last_id = docs[-1]["_id"]
+        print(f"  ... {collection.name}: {modified} documents migrated")
+        await asyncio.sleep(pause_seconds)
+
+    return modified
+
+async def reconcile_from_aggregation(
+    collection,
+    cursor,
+    build_fields: Callable[[dict], dict],
+    stamp_field: str,
+    reset_fields: dict,
+    batch_size: int = MIGRATION_BATCH_SIZE
+) -> Tuple[int, int]:
+    """Overwrite maintained totals with values recomputed by an aggregation, returns (updated, reset) counts
+
+    cursor yields one row per target document, keyed by the target's _id (ObjectId or hex string),
+    and build_fields turns a row into the fields to set. Every updated document is stamped with
+    the run's start time in stamp_field, documents left unstamped had no rows and get reset_fields.
+    """
+    run_started_at = datetime.now()
+
+    updated = 0
+    batch = []
+    async for row in cursor:
+        if not ObjectId.is_valid(row["_id"]):
+            continue
+        batch.append(UpdateOne(
+            {"_id": ObjectId(row["_id"])},
+            {"$set": {**build_fields(row), stamp_field: run_started_at}}
+        ))
+        if len(batch) >= batch_size:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.matched_count
+            batch = []
+
+    if batch:
+        result = await collection.bulk_write(batch, ordered=False)
+        updated += result.matched_count
+
+    result = await collection.update_many(
+        {stamp_field: {"$ne": run_started_at}},
+        {"$set": {**reset_fields, stamp_field: run_started_at}}
+    )
+    return updated, result.modified_count
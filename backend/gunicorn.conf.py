@@ -11,6 +11,9 @@ worker_connections = 1000
 timeout = 30
 keepalive = 2
 
+# Proxies whose X-Forwarded-For / X-Forwarded-Proto headers are trusted for the client address
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
 # Restart workers
 max_requests = 1000
 max_requests_jitter = 50
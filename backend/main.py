@@ -1,9 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+import asyncio
 import os
 
 from database.connection import connect_to_mongo, close_mongo_connection
+from database.indexes import ensure_indexes
+from utils.auth import password_executor
+from utils.metrics import metrics
+from controllers.tracking_controller import TrackingController, TRACKING_CHANGE_STREAM
+from controllers.settings_controller import SettingsController
+from controllers.image_controller import ImageController
 from routes.auth import router as auth_router
 from routes.products import router as products_router
 from routes.cart import router as cart_router
@@ -50,16 +57,33 @@ app.include_router(orders_router, prefix="/api/orders", tags=["Order Management"
 app.include_router(tracking_router, prefix="/api/tracking", tags=["Order Tracking"])
 app.include_router(customers_router, prefix="/api/customers", tags=["Customer Management"])
 
+# Long-running background tasks started with the application
+background_tasks = []
+
 @app.on_event("startup")
 async def startup_db_client():
     """Connect to database on application startup"""
     print("🚀 Starting AWE Electronics API...")
     await connect_to_mongo()
+    await ensure_indexes()
+    
+    try:
+        await SettingsController.load_settings()
+    except Exception as e:
+        print(f"⚠️ Failed to load system settings, using defaults: {e}")
+    background_tasks.append(asyncio.create_task(SettingsController.watch_version()))
+    
+    if TRACKING_CHANGE_STREAM:
+        background_tasks.append(asyncio.create_task(TrackingController.watch_changes()))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Disconnect from database on application shutdown"""
     print("🛑 Shutting down AWE Electronics API...")
+    for task in background_tasks:
+        task.cancel()
+    password_executor.shutdown(wait=False)
+    ImageController.shutdown()
     await close_mongo_connection()
 
 @app.get("/")
@@ -100,6 +124,14 @@ async def health_check_z():
         "version": "1.0.0"
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """In-process API metrics"""
+    return {
+        "status": "ok",
+        "metrics": metrics.snapshot()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     
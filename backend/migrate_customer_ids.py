@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+customer_id migration script
+rewrite customer_id references stored as ObjectId to the canonical string form
+(see utils/ids.py) in orders, cart_items and tracking, in small online batches.
+cart rows stored under both forms for the same product are merged first.
+"""
+import asyncio
+from dotenv import load_dotenv
+from pymongo import UpdateOne, DeleteMany
+
+from database.connection import get_collection, connect_to_mongo, close_mongo_connection
+from database.migrations import migrate_in_batches
+from utils.ids import customer_key, CUSTOMER_REFERENCE_COLLECTIONS
+
+def build_customer_id_update(doc: dict):
+    """convert one document's customer_id to its canonical form"""
+    return UpdateOne(
+        {"_id": doc["_id"], "customer_id": doc["customer_id"]},
+        {"$set": {"customer_id": customer_key(doc["customer_id"])}}
+    )
+
+async def merge_duplicate_cart_items() -> int:
+    """merge cart rows of the same customer and product stored under both customer_id forms"""
+    collection = await get_collection("cart_items")
+    pipeline = [
+        {"$group": {
+            "_id": {"customer_id": {"$toString": "$customer_id"}, "product_id": "$product_id"},
+            "items": {"$push": {"_id": "$_id", "customer_id": "$customer_id", "quantity": "$quantity"}},
+            "quantity": {"$sum": "$quantity"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+
+    merged = 0
+    operations = []
+    async for group in collection.aggregate(pipeline, allowDiskUse=True):
+        # keep the row already in canonical form when there is one
+        items = sorted(group["items"], key=lambda item: not isinstance(item["customer_id"], str))
+        keep, duplicates = items[0], items[1:]
+        operations.append(UpdateOne(
+            {"_id": keep["_id"]},
+            {"$set": {"customer_id": group["_id"]["customer_id"], "quantity": group["quantity"]}}
+        ))
+        operations.append(DeleteMany({"_id": {"$in": [item["_id"] for item in duplicates]}}))
+        merged += len(duplicates)
+
+        if len(operations) >= 500:
+            await collection.bulk_write(operations, ordered=True)
+            operations = []
+
+    if operations:
+        await collection.bulk_write(operations, ordered=True)
+    return merged
+
+async def migrate_customer_ids():
+    """migrate customer_id references"""
+    try:
+        await connect_to_mongo()
+
+        print("🔄 merging duplicate cart items...")
+        merged = await merge_duplicate_cart_items()
+        print(f"✅ cart_items: {merged} duplicate rows merged")
+
+        for collection_name in CUSTOMER_REFERENCE_COLLECTIONS:
+            collection = await get_collection(collection_name)
+            print(f"🔄 migrating {collection_name}...")
+            modified = await migrate_in_batches(
+                collection,
+                {"customer_id": {"$type": "objectId"}},
+                build_customer_id_update,
+                projection={"customer_id": 1}
+            )
+            print(f"✅ {collection_name}: {modified} documents migrated")
+
+        print("\n🎉 customer_id migration completed!")
+
+    except Exception as e:
+        print(f"❌ migration failed: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    load_dotenv("config.env")
+    print("🚀 start migrating customer_id references...")
+    asyncio.run(migrate_customer_ids())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+product schema migration script
+canonicalize stock/availability fields across the catalog:
+stock_quantity (int) and is_available (bool) are kept, legacy stock/active are folded in and removed
+"""
+import asyncio
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from database.connection import get_collection, connect_to_mongo, close_mongo_connection
+from database.migrations import migrate_in_batches
+
+# products that still carry legacy fields or miss canonical ones
+LEGACY_PRODUCT_QUERY = {
+    "$or": [
+        {"stock": {"$exists": True}},
+        {"active": {"$exists": True}},
+        {"stock_quantity": {"$exists": False}},
+        {"is_available": {"$exists": False}},
+        {"stock_quantity": {"$not": {"$type": "int"}}},
+        {"is_available": {"$not": {"$type": "bool"}}}
+    ]
+}
+
+def build_product_update(doc: dict):
+    """build the canonical stock/availability fields for one product"""
+    stock_quantity = doc.get("stock_quantity", doc.get("stock"))
+    is_available = doc.get("is_available", doc.get("active"))
+
+    try:
+        stock_quantity = max(int(stock_quantity or 0), 0)
+    except (TypeError, ValueError):
+        stock_quantity = 0
+
+    return UpdateOne(
+        {"_id": doc["_id"]},
+        {
+            "$set": {
+                "stock_quantity": stock_quantity,
+                "is_available": True if is_available is None else bool(is_available)
+            },
+            "$unset": {"stock": "", "active": ""}
+        }
+    )
+
+async def migrate_product_fields():
+    """migrate product stock/availability fields"""
+    try:
+        await connect_to_mongo()
+
+        collection = await get_collection("products")
+        print("🔄 migrating products...")
+        modified = await migrate_in_batches(
+            collection,
+            LEGACY_PRODUCT_QUERY,
+            build_product_update,
+            projection={"stock_quantity": 1, "stock": 1, "is_available": 1, "active": 1}
+        )
+        print(f"✅ products: {modified} documents migrated")
+
+    except Exception as e:
+        print(f"❌ migration failed: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    load_dotenv("config.env")
+    print("🚀 start migrating product stock/availability fields...")
+    asyncio.run(migrate_product_fields())
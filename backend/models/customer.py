@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator, ConfigDict, Field
-from typing import Optional, Annotated
+from typing import Optional, Annotated, Literal
 from datetime import datetime
 from bson import ObjectId
 
@@ -68,6 +68,8 @@ class CustomerSearch(BaseModel):
     phone: Optional[str] = None
     is_active: Optional[bool] = None
     keyword: Optional[str] = None
+    # contains (full scan) until backfill_customer_search.py has run, prefix (indexed) after
+    search_mode: Literal["prefix", "contains"] = "contains"
     sort_by: Optional[str] = "created_at"
     sort_order: Optional[str] = "desc"
 
@@ -82,6 +84,8 @@ class Customer(CustomerBase):
     hashed_password: str
     is_active: bool = True
     is_admin: bool = False
+    total_orders: int = 0  # Maintained incrementally by OrderController
+    total_spent: float = 0.0
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
@@ -33,6 +33,9 @@ class OrderStatus(str, Enum):
     REFUNDED = "refunded"        # Refunded
     ARCHIVED = "archived"        # Archived
 
+# Orders in these statuses don't count towards revenue and customer spend
+REVENUE_EXCLUDED_STATUSES = (OrderStatus.CANCELLED, OrderStatus.REFUNDED)
+
 class PaymentMethod(str, Enum):
     """Payment method enumeration"""
     CREDIT_CARD = "credit_card"
@@ -158,6 +161,7 @@ class OrderSearch(BaseModel):
     customer_id: Optional[str] = None
     status: Optional[OrderStatus] = None
     order_number: Optional[str] = None
+    order_number_mode: Optional[str] = "auto"  # auto, exact, prefix, contains
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     sort_by: Optional[str] = "created_at"
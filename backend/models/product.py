@@ -113,7 +113,8 @@ class Product(ProductBase):
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     views_count: int = 0
-    sales_count: int = 0
+    sales_count: int = 0  # Units sold, maintained by OrderController
+    sales_revenue: float = 0.0
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -129,6 +130,7 @@ class ProductResponse(ProductBase):
     updated_at: datetime
     views_count: int
     sales_count: int
+    image_variants: Optional[List[dict]] = []  # Resized derivatives per original image
 
     model_config = ConfigDict(
         populate_by_name=True,
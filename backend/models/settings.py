@@ -0,0 +1,16 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+
+class SystemSettingsUpdate(BaseModel):
+    """System settings update model"""
+    site_name: Optional[str] = None
+    site_description: Optional[str] = None
+    contact_email: Optional[str] = None
+    contact_phone: Optional[str] = None
+    # Pricing settings read by order creation
+    tax_rate: Optional[float] = Field(None, ge=0, le=1)
+    free_shipping_threshold: Optional[float] = Field(None, ge=0)
+    shipping_fee: Optional[float] = Field(None, ge=0)
+
+    # Other display settings are stored as sent
+    model_config = ConfigDict(extra="allow")
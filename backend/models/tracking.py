@@ -4,6 +4,8 @@ from datetime import datetime
 from enum import Enum
 from bson import ObjectId
 
+from utils.datetimes import naive_utc
+
 class PyObjectId(ObjectId):
     @classmethod
     def __get_validators__(cls):
@@ -71,11 +73,13 @@ class OrderTrackingBase(BaseModel):
     """Order tracking base model"""
     order_id: str
     order_number: str
-    tracking_number: str
-    carrier: str
+    customer_id: Optional[str] = None
+    tracking_number: Optional[str] = None
+    carrier: str = "AWE Express"
     current_status: TrackingStatus
     estimated_delivery: Optional[datetime] = None
-    events: List[TrackingEvent] = []
+    events: List[TrackingEvent] = []  # Most recent events only, see event_count for the full history
+    event_count: int = 0
 
 class OrderTracking(OrderTrackingBase):
     """Order tracking complete model"""
@@ -117,10 +121,29 @@ class TrackingUpdate(BaseModel):
     tracking_number: Optional[str] = None
     estimated_delivery: Optional[datetime] = None
 
+class CarrierEvent(BaseModel):
+    """Carrier status event, identified by tracking number or order ID"""
+    tracking_number: Optional[str] = None
+    order_id: Optional[str] = None
+    status: TrackingStatus
+    location: str
+    timestamp: datetime
+    description: Optional[str] = None
+
+    @validator('timestamp')
+    def validate_timestamp(cls, v):
+        # Carriers mix offsets and naive values, events are sorted, keyed and stored as naive UTC
+        return naive_utc(v)
+
+class CarrierEventBatch(BaseModel):
+    """Bulk carrier event ingestion model"""
+    events: List[CarrierEvent] = Field(..., min_length=1, max_length=1000)
+
 class TrackingSearch(BaseModel):
     """Tracking search model"""
     tracking_number: Optional[str] = None
     order_number: Optional[str] = None
+    order_number_mode: Optional[str] = "auto"  # auto, exact, prefix, contains
     customer_id: Optional[str] = None
     status: Optional[TrackingStatus] = None
 
@@ -130,6 +153,14 @@ class DeliveryEstimate(BaseModel):
     estimated_delivery_date: datetime
     shipping_method: str
 
+class BatchDeliveryEstimate(DeliveryEstimate):
+    """Delivery estimate for one order of a batch request"""
+    order_number: str
+
+class DeliveryEstimateRequest(BaseModel):
+    """Batch delivery estimate request model"""
+    order_numbers: List[str] = Field(..., min_length=1, max_length=100)
+
 class TrackingSummary(BaseModel):
     """Tracking summary model"""
     order_number: str
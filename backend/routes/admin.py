@@ -1,11 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, UploadFile, File, Form
+from fastapi.responses import FileResponse, StreamingResponse
+from datetime import datetime
 from database.connection import get_collection
 from models.product import ProductCreate, ProductUpdate, Product
 from models.order import Order
 from models.customer import Customer
+from models.settings import SystemSettingsUpdate
 from bson import ObjectId
+from pymongo import ReturnDocument
+from controllers.order_controller import OrderController
+from controllers.dashboard_controller import DashboardController, DASHBOARD_TOPIC
+from controllers.settings_controller import SettingsController
+from controllers.image_controller import ImageController, PRODUCT_IMAGE_DIR, PRODUCT_IMAGE_URL
+from utils.images import IMAGE_VARIANTS, VARIANT_FORMATS, variant_filename
+from utils.event_bus import sse_stream
+from utils.uploads import save_upload
+from utils.customer_search import CUSTOMER_SEARCH_FIELDS
+from utils.auth import get_current_admin_user_id, get_stream_admin_user_id
 from typing import Optional, List
 import os
 import json
@@ -19,52 +30,11 @@ router = APIRouter()
 async def get_dashboard_stats():
     """Get dashboard statistics data"""
     try:
-        # Get collections
-        orders_collection = await get_collection("orders")
-        products_collection = await get_collection("products")
-        customers_collection = await get_collection("customers")
-        
-        # Calculate total orders
-        total_orders = await orders_collection.count_documents({})
-        
-        # Calculate total products
-        total_products = await products_collection.count_documents({})
-        
-        # Calculate total customers
-        total_customers = await customers_collection.count_documents({})
-        
-        # Calculate today's orders
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_orders = await orders_collection.count_documents({
-            "created_at": {"$gte": today}
-        })
-        
-        # Calculate total revenue
-        pipeline = [
-            {"$group": {"_id": None, "total_revenue": {"$sum": "$total_amount"}}}
-        ]
-        revenue_result = await orders_collection.aggregate(pipeline).to_list(1)
-        total_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0
-        
-        # Calculate monthly revenue
-        month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        month_pipeline = [
-            {"$match": {"created_at": {"$gte": month_start}}},
-            {"$group": {"_id": None, "month_revenue": {"$sum": "$total_amount"}}}
-        ]
-        month_result = await orders_collection.aggregate(month_pipeline).to_list(1)
-        month_revenue = month_result[0]["month_revenue"] if month_result else 0
+        stats = await DashboardController.get_dashboard_stats()
         
         return {
             "success": True,
-            "data": {
-                "total_orders": total_orders,
-                "total_products": total_products,
-                "total_customers": total_customers,
-                "today_orders": today_orders,
-                "total_revenue": total_revenue,
-                "month_revenue": month_revenue
-            }
+            "data": stats
         }
         
     except Exception as e:
@@ -74,39 +44,8 @@ async def get_dashboard_stats():
 async def get_sales_trends():
     """Get sales trends data"""
     try:
-        orders_collection = await get_collection("orders")
-        
-        # Get sales data for the past 7 days
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=6)
-        
-        pipeline = [
-            {
-                "$match": {
-                    "created_at": {
-                        "$gte": start_date.replace(hour=0, minute=0, second=0, microsecond=0),
-                        "$lte": end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-                    }
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "$dateToString": {
-                            "format": "%Y-%m-%d",
-                            "date": "$created_at"
-                        }
-                    },
-                    "daily_revenue": {"$sum": "$total_amount"},
-                    "daily_orders": {"$sum": 1}
-                }
-            },
-            {
-                "$sort": {"_id": 1}
-            }
-        ]
-        
-        results = await orders_collection.aggregate(pipeline).to_list(7)
+        # Past 7 days from the daily sales rollup
+        results = await DashboardController.get_sales_trends(days=7)
         
         return {
             "success": True,
@@ -116,21 +55,45 @@ async def get_sales_trends():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get sales trends: {str(e)}")
 
+@router.get("/dashboard/analytics")
+async def get_sales_analytics(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    granularity: str = "day",
+    metrics: str = "orders,revenue",
+    window: int = Query(7, ge=1, le=90),
+    current_admin_id: str = Depends(get_current_admin_user_id)
+):
+    """Get sales analytics for a date range (granularity: hour, day, week, month;
+    metrics: orders, revenue, units, average_order_value)"""
+    try:
+        analytics = await DashboardController.get_sales_analytics(
+            start_date,
+            end_date,
+            granularity=granularity,
+            metrics=[metric.strip() for metric in metrics.split(",") if metric.strip()],
+            window=window
+        )
+        
+        return {
+            "success": True,
+            "data": analytics
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get sales analytics: {str(e)}")
+
 @router.get("/dashboard/best-selling-products")
-async def get_best_selling_products():
+async def get_best_selling_products(
+    days: Optional[int] = Query(None, ge=1, le=90, description="Rank by sales over the last N days (e.g. 7, 30), all time when omitted"),
+    limit: int = Query(5, ge=1, le=50)
+):
     """Get best selling products"""
     try:
-        products_collection = await get_collection("products")
-        
-        # Sort by sales count, get top 5 products
-        cursor = products_collection.find({}).sort("sales_count", -1).limit(5)
-        products = await cursor.to_list(5)
+        products = await DashboardController.get_best_selling_products(days, limit)
         
-        # Convert ObjectId to string
-        for product in products:
-            product["id"] = str(product["_id"])
-            del product["_id"]
-            
         return {
             "success": True,
             "data": products
@@ -139,6 +102,21 @@ async def get_best_selling_products():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get best selling products: {str(e)}")
 
+@router.get("/dashboard/stream")
+async def stream_dashboard_updates(
+    request: Request,
+    current_admin_id: str = Depends(get_stream_admin_user_id)
+):
+    """Stream dashboard deltas: order_created / order_updated / order_deleted and low_stock (Server-Sent Events)
+    
+    EventSource clients pass the access token as ?token=...
+    """
+    return StreamingResponse(
+        sse_stream(request, DASHBOARD_TOPIC),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ==================== Product Management ====================
 
 @router.get("/products")
@@ -220,8 +198,10 @@ async def create_product(product_data: ProductCreate):
         product_dict["updated_at"] = datetime.now()
         product_dict["views_count"] = 0
         product_dict["sales_count"] = 0
+        product_dict["sales_revenue"] = 0.0
         
         result = await collection.insert_one(product_dict)
+        await ImageController.attach_variants(str(result.inserted_id), product_dict.get("images"))
         
         # Get created product
         created_product = await collection.find_one({"_id": result.inserted_id})
@@ -256,6 +236,7 @@ async def update_product(product_id: str, product_data: ProductUpdate):
             {"_id": ObjectId(product_id)},
             {"$set": update_data}
         )
+        await ImageController.attach_variants(product_id, update_data.get("images"))
         
         # Get updated product
         updated_product = await collection.find_one({"_id": ObjectId(product_id)})
@@ -362,16 +343,16 @@ async def update_order_status(order_id: str, status: str):
     try:
         collection = await get_collection("orders")
         
-        # Check if order exists
-        order = await collection.find_one({"_id": ObjectId(order_id)})
+        # Update status, keeping the previous state for statistics
+        order = await collection.find_one_and_update(
+            {"_id": ObjectId(order_id)},
+            {"$set": {"status": status, "updated_at": datetime.now()}},
+            return_document=ReturnDocument.BEFORE
+        )
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        # Update status
-        await collection.update_one(
-            {"_id": ObjectId(order_id)},
-            {"$set": {"status": status, "updated_at": datetime.now()}}
-        )
+        await OrderController.apply_status_transition(order, status)
         
         return {
             "success": True,
@@ -395,16 +376,15 @@ async def get_all_customers(page: int = 1, limit: int = 10):
         # Get total count
         total = await collection.count_documents({})
         
-        # Get customer data
-        cursor = collection.find({}).skip(skip).limit(limit).sort("created_at", -1)
+        # Get customer data without sensitive and internal fields
+        projection = {field: 0 for field in ("hashed_password", "stats_reconciled_at", *CUSTOMER_SEARCH_FIELDS)}
+        cursor = collection.find({}, projection).skip(skip).limit(limit).sort("created_at", -1)
         customers = await cursor.to_list(limit)
         
-        # Convert ObjectId to string and remove sensitive information
+        # Convert ObjectId to string
         for customer in customers:
             customer["id"] = str(customer["_id"])
             del customer["_id"]
-            if "hashed_password" in customer:
-                del customer["hashed_password"]
             
         return {
             "success": True,
@@ -427,7 +407,7 @@ async def upload_image(file: UploadFile = File(...)):
     """Upload product image"""
     try:
         # Create upload directory
-        upload_dir = Path("frontend/src/assets/products")
+        upload_dir = PRODUCT_IMAGE_DIR
         upload_dir.mkdir(parents=True, exist_ok=True)
         
         # Check file type
@@ -436,27 +416,40 @@ async def upload_image(file: UploadFile = File(...)):
         
         # Generate unique filename
         file_extension = file.filename.split(".")[-1]
-        unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
+        unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{Path(file.filename).name}"
         file_path = upload_dir / unique_filename
         
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Stream file to disk with size limit and content hash
+        size, content_hash = await save_upload(file, file_path)
         
         # Return relative path
-        relative_path = f"/src/assets/products/{unique_filename}"
+        relative_path = f"{PRODUCT_IMAGE_URL}{unique_filename}"
+        
+        # Resized derivatives are generated in the background and recorded on products using the image
+        ImageController.enqueue_variants(file_path, relative_path)
+        variants = {
+            variant: {
+                key: f"{PRODUCT_IMAGE_URL}{variant_filename(unique_filename, variant, extension)}"
+                for key, (_, extension, _) in VARIANT_FORMATS.items()
+            }
+            for variant in IMAGE_VARIANTS
+        }
         
         return {
             "success": True,
             "data": {
                 "filename": unique_filename,
                 "path": relative_path,
-                "url": relative_path
+                "url": relative_path,
+                "size": size,
+                "sha256": content_hash,
+                "variants": variants
             },
             "message": "Image uploaded successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
@@ -466,20 +459,7 @@ async def upload_image(file: UploadFile = File(...)):
 async def get_system_settings():
     """Get system settings"""
     try:
-        collection = await get_collection("settings")
-        
-        settings = await collection.find_one({"type": "system"})
-        if not settings:
-            # Return default settings
-            settings = {
-                "site_name": "AWE Electronics",
-                "site_description": "Electronics Store",
-                "contact_email": "admin@aweelectronics.com",
-                "contact_phone": "+1-234-567-8900"
-            }
-        else:
-            settings["id"] = str(settings["_id"])
-            del settings["_id"]
+        settings = SettingsController.get_settings()
         
         return {
             "success": True,
@@ -490,20 +470,13 @@ async def get_system_settings():
         raise HTTPException(status_code=500, detail=f"Failed to get system settings: {str(e)}")
 
 @router.put("/settings")
-async def update_system_settings(settings_data: dict):
-    """Update system settings"""
+async def update_system_settings(
+    settings_data: SystemSettingsUpdate,
+    current_admin_id: str = Depends(get_current_admin_user_id)
+):
+    """Update system settings (admin only, pricing settings are validated)"""
     try:
-        collection = await get_collection("settings")
-        
-        settings_data["type"] = "system"
-        settings_data["updated_at"] = datetime.now()
-        
-        # Use upsert to update or create settings
-        await collection.replace_one(
-            {"type": "system"}, 
-            settings_data, 
-            upsert=True
-        )
+        await SettingsController.update_settings(settings_data.dict(exclude_none=True))
         
         return {
             "success": True,
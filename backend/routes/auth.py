@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from pydantic import BaseModel
 
 from controllers.auth_controller import AuthController
 from models.customer import CustomerCreate, CustomerLogin, CustomerUpdate, ChangePasswordRequest
 from utils.auth import get_current_user_id
+from utils.rate_limit import client_address
 from utils.response import success_response, APIResponse
 
 router = APIRouter()
@@ -18,9 +19,10 @@ async def register(customer_data: CustomerCreate):
     return success_response(data=result, message="Registration successful")
 
 @router.post("/login", response_model=APIResponse)
-async def login(login_data: CustomerLogin):
+async def login(login_data: CustomerLogin, request: Request):
     """User login"""
-    result = await AuthController.login_customer(login_data)
+    client_ip = client_address(request)
+    result = await AuthController.login_customer(login_data, client_ip)
     return success_response(data=result, message="Login successful")
 
 @router.get("/profile", response_model=APIResponse)
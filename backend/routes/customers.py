@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, Query, status
-from typing import Optional
+from typing import Optional, Literal
 from datetime import datetime
 
 from controllers.customer_controller import CustomerController
@@ -12,6 +12,7 @@ router = APIRouter()
 @router.get("/", response_model=APIResponse)
 async def search_customers(
     keyword: Optional[str] = Query(None, description="Search keyword (name, email)"),
+    search_mode: Literal["prefix", "contains"] = Query("contains", description="Keyword match mode (prefix, contains)"),
     sort_by: Optional[str] = Query("created_at", description="Sort field"),
     sort_order: Optional[str] = Query("desc", description="Sort direction"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -21,6 +22,7 @@ async def search_customers(
     """Search customers (admin only)"""
     search_params = CustomerSearch(
         keyword=keyword,
+        search_mode=search_mode,
         sort_by=sort_by,
         sort_order=sort_order
     )
@@ -30,6 +32,16 @@ async def search_customers(
     
     return paginate_response(customer_list, total, page, size, "Customers retrieved successfully")
 
+@router.get("/typeahead", response_model=APIResponse)
+async def customer_typeahead(
+    q: str = Query(..., min_length=1, description="Name, username or email prefix, or @domain"),
+    limit: int = Query(10, ge=1, le=20, description="Maximum suggestions"),
+    current_admin_id: str = Depends(get_current_admin_user_id)
+):
+    """Customer search suggestions (admin only)"""
+    suggestions = await CustomerController.typeahead(q, limit)
+    return success_response(data=suggestions, message="Customer suggestions retrieved successfully")
+
 @router.get("/{customer_id}", response_model=APIResponse)
 async def get_customer(
     customer_id: str,
@@ -33,6 +33,7 @@ async def admin_search_orders(
     customer_id: Optional[str] = Query(None, description="Customer ID"),
     status_filter: Optional[OrderStatus] = Query(None, alias="status", description="Order status"),
     order_number: Optional[str] = Query(None, description="Order number"),
+    order_number_mode: Optional[str] = Query("auto", description="Order number match mode (auto, exact, prefix, contains)"),
     start_date: Optional[datetime] = Query(None, description="Start date"),
     end_date: Optional[datetime] = Query(None, description="End date"),
     sort_by: Optional[str] = Query("created_at", description="Sort field"),
@@ -46,6 +47,7 @@ async def admin_search_orders(
         customer_id=customer_id,
         status=status_filter,
         order_number=order_number,
+        order_number_mode=order_number_mode,
         start_date=start_date,
         end_date=end_date,
         sort_by=sort_by,
@@ -79,6 +81,7 @@ async def get_order_by_number(
 async def search_orders(
     status_filter: Optional[OrderStatus] = Query(None, alias="status", description="Order status"),
     order_number: Optional[str] = Query(None, description="Order number"),
+    order_number_mode: Optional[str] = Query("auto", description="Order number match mode (auto, exact, prefix, contains)"),
     start_date: Optional[datetime] = Query(None, description="Start date"),
     end_date: Optional[datetime] = Query(None, description="End date"),
     sort_by: Optional[str] = Query("created_at", description="Sort field"),
@@ -92,6 +95,7 @@ async def search_orders(
         customer_id=current_user_id,
         status=status_filter,
         order_number=order_number,
+        order_number_mode=order_number_mode,
         start_date=start_date,
         end_date=end_date,
         sort_by=sort_by,
@@ -112,6 +116,15 @@ async def get_order(
     order = await OrderController.get_order(order_id, current_user_id)
     return success_response(data=order.dict(), message="Order details retrieved successfully")
 
+@router.get("/{order_id}/detail", response_model=APIResponse)
+async def get_order_detail(
+    order_id: str,
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Get order details together with tracking information"""
+    detail = await OrderController.get_order_detail(order_id, current_user_id)
+    return success_response(data=detail, message="Order details retrieved successfully")
+
 @router.put("/{order_id}/status", response_model=APIResponse)
 async def update_order_status(
     order_id: str,
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
 from controllers.tracking_controller import TrackingController
-from models.tracking import TrackingUpdate, TrackingSearch, TrackingStatus
-from utils.auth import get_current_user_id
+from models.tracking import TrackingUpdate, TrackingSearch, TrackingStatus, DeliveryEstimateRequest, CarrierEventBatch
+from utils.auth import get_current_user_id, get_current_admin_user_id
 from utils.response import success_response, paginate_response, APIResponse
+from utils.event_bus import sse_stream
+from utils.ids import customer_key
 
 router = APIRouter()
 
@@ -17,6 +20,18 @@ async def get_tracking_by_order(
     tracking = await TrackingController.get_tracking_by_order_id(order_id)
     return success_response(data=tracking.dict(), message="Tracking information retrieved successfully")
 
+@router.get("/order/{order_id}/events", response_model=APIResponse)
+async def get_tracking_events(
+    order_id: str,
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(20, ge=1, le=100, description="Items per page"),
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Get paginated tracking event history by order ID"""
+    events, total = await TrackingController.get_tracking_events(order_id, page, size)
+    event_list = [event.dict() for event in events]
+    return paginate_response(event_list, total, page, size, "Tracking events retrieved successfully")
+
 @router.get("/number/{order_number}", response_model=APIResponse)
 async def get_tracking_by_order_number(order_number: str):
     """Get tracking information by order number (public interface)"""
@@ -30,15 +45,33 @@ async def get_tracking_by_tracking_number(tracking_number: str):
     return success_response(data=tracking.dict(), message="Tracking information retrieved successfully")
 
 @router.get("/summary", response_model=APIResponse)
-async def get_tracking_summary(current_user_id: str = Depends(get_current_user_id)):
+async def get_tracking_summary(
+    active_only: bool = Query(False, description="Only orders that are still in progress"),
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(20, ge=1, le=100, description="Items per page"),
+    current_user_id: str = Depends(get_current_user_id)
+):
     """Get user's order tracking summary"""
-    summaries = await TrackingController.get_tracking_summary(current_user_id)
+    summaries, total = await TrackingController.get_tracking_summary(current_user_id, page, size, active_only)
     summary_list = [summary.dict() for summary in summaries]
-    return success_response(data=summary_list, message="Tracking summary retrieved successfully")
+    return paginate_response(summary_list, total, page, size, "Tracking summary retrieved successfully")
+
+@router.get("/stream")
+async def stream_tracking_updates(
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id)
+):
+    """Stream tracking status changes for the user's orders (Server-Sent Events)"""
+    return StreamingResponse(
+        sse_stream(request, f"tracking:{customer_key(current_user_id)}"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/", response_model=APIResponse)
 async def search_tracking(
     order_number: Optional[str] = Query(None, description="Order number"),
+    order_number_mode: Optional[str] = Query("auto", description="Order number match mode (auto, exact, prefix, contains)"),
     tracking_number: Optional[str] = Query(None, description="Tracking number"),
     status: Optional[TrackingStatus] = Query(None, description="Tracking status"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -48,6 +81,7 @@ async def search_tracking(
     """Search tracking records"""
     search_params = TrackingSearch(
         order_number=order_number,
+        order_number_mode=order_number_mode,
         tracking_number=tracking_number,
         customer_id=current_user_id,
         status=status
@@ -64,6 +98,12 @@ async def get_delivery_estimate(order_number: str):
     estimate = await TrackingController.get_delivery_estimate(order_number)
     return success_response(data=estimate.dict(), message="Delivery estimate retrieved successfully")
 
+@router.post("/estimates", response_model=APIResponse)
+async def get_delivery_estimates(request_data: DeliveryEstimateRequest):
+    """Get delivery estimates for many orders at once"""
+    estimates = await TrackingController.get_delivery_estimates(request_data.order_numbers)
+    return success_response(data=estimates, message="Delivery estimates retrieved successfully")
+
 # Admin-only interfaces
 @router.put("/order/{order_id}", response_model=APIResponse)
 async def update_tracking_status(
@@ -81,9 +121,19 @@ async def update_tracking_status(
     )
     return success_response(data=tracking.dict(), message="Tracking status updated successfully")
 
+@router.post("/events/bulk", response_model=APIResponse)
+async def ingest_carrier_events(
+    batch: CarrierEventBatch,
+    current_admin_id: str = Depends(get_current_admin_user_id)
+):
+    """Ingest a batch of carrier status events (admin function)"""
+    result = await TrackingController.ingest_carrier_events(batch.events)
+    return success_response(data=result, message="Carrier events processed")
+
 @router.get("/admin/all", response_model=APIResponse)
 async def admin_search_tracking(
     order_number: Optional[str] = Query(None, description="Order number"),
+    order_number_mode: Optional[str] = Query("auto", description="Order number match mode (auto, exact, prefix, contains)"),
     tracking_number: Optional[str] = Query(None, description="Tracking number"),
     customer_id: Optional[str] = Query(None, description="Customer ID"),
     status: Optional[TrackingStatus] = Query(None, description="Tracking status"),
@@ -94,6 +144,7 @@ async def admin_search_tracking(
     """Admin search all tracking records"""
     search_params = TrackingSearch(
         order_number=order_number,
+        order_number_mode=order_number_mode,
         tracking_number=tracking_number,
         customer_id=customer_id,
         status=status
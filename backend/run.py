@@ -33,6 +33,8 @@ def main():
         host=host,
         port=port,
         reload=debug,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
         log_level="info" if debug else "warning"
     )
 
@@ -21,11 +21,15 @@ fi
 # Set default port for Render (Render uses PORT environment variable)
 PORT=${PORT:-10000}
 
+# Proxies whose X-Forwarded-For / X-Forwarded-Proto headers are trusted for the client address
+FORWARDED_ALLOW_IPS=${FORWARDED_ALLOW_IPS:-127.0.0.1}
+
 echo "✅ Environment variables validated"
 echo "🌐 Starting server on port $PORT"
 echo "📊 Database: $DATABASE_NAME"
 echo "🔒 Debug mode: $DEBUG"
+echo "🔁 Trusted proxies: $FORWARDED_ALLOW_IPS"
 
 # Start the application with uvicorn
 # Use single worker for free tier, can increase for paid plans
-exec uvicorn main:app --host 0.0.0.0 --port $PORT --workers 1 
\ No newline at end of file
+exec uvicorn main:app --host 0.0.0.0 --port $PORT --workers 1 --proxy-headers --forwarded-allow-ips "$FORWARDED_ALLOW_IPS" 
\ No newline at end of file
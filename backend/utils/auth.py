@@ -1,17 +1,36 @@
 import os
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from bson import ObjectId
 
 from database.connection import get_collection
+from utils.metrics import metrics
+from utils.cache import TTLCache, MISSING
 
 # Password encryption context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow, so hashing runs on a small dedicated pool instead of the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+# Password verifications allowed in flight before new ones are rejected with 429
+PASSWORD_VERIFY_MAX_IN_FLIGHT = int(os.getenv("PASSWORD_VERIFY_MAX_IN_FLIGHT", "8"))
+
+# Password jobs submitted to the pool and not finished yet (running + queued)
+_password_jobs_in_flight = 0
+
+metrics.register_gauge("password_hash_in_flight", lambda: _password_jobs_in_flight)
+metrics.register_gauge("password_hash_queue_depth", lambda: max(_password_jobs_in_flight - PASSWORD_HASH_WORKERS, 0))
+
 # JWT configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
@@ -19,6 +38,30 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 
 # HTTP Bearer authentication
 security = HTTPBearer()
+# Streams also accept the token as a query parameter (EventSource can't send headers)
+stream_security = HTTPBearer(auto_error=False)
+
+# Access token role claims
+ROLE_ADMIN = "admin"
+ROLE_CUSTOMER = "customer"
+
+# Authorization flags per user, so admin requests don't read customers every call
+USER_FLAGS_CACHE_TTL = float(os.getenv("USER_FLAGS_CACHE_TTL", "60"))
+user_flags_cache = TTLCache(maxsize=10000, ttl=USER_FLAGS_CACHE_TTL)
+
+# Verified access tokens by token hash, entries never outlive the token's exp
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+def _token_cache_hit_rate() -> float:
+    """Share of token verifications served from the cache"""
+    hits = metrics.get("token_cache_hits_total")
+    total = hits + metrics.get("token_cache_misses_total")
+    return round(hits / total, 4) if total else 0.0
+
+metrics.register_gauge("token_cache_size", lambda: len(token_cache))
+metrics.register_gauge("token_cache_hit_rate", _token_cache_hit_rate)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password"""
@@ -28,6 +71,59 @@ def get_password_hash(password: str) -> str:
     """Get password hash"""
     return pwd_context.hash(password)
 
+async def _run_password_job(func, *args):
+    """Run a bcrypt operation on the password pool without blocking the event loop"""
+    global _password_jobs_in_flight
+    
+    loop = asyncio.get_running_loop()
+    _password_jobs_in_flight += 1
+    metrics.inc("password_hash_jobs_total")
+    try:
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        _password_jobs_in_flight -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password on the password pool, failing fast when the pool is saturated"""
+    if _password_jobs_in_flight >= PASSWORD_VERIFY_MAX_IN_FLIGHT:
+        metrics.inc("password_verify_rejected_total")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Get password hash on the password pool"""
+    return await _run_password_job(get_password_hash, password)
+
+def user_role(user_doc: dict) -> str:
+    """Role claim for a customer document"""
+    return ROLE_ADMIN if user_doc.get("is_admin", False) else ROLE_CUSTOMER
+
+async def get_user_flags(user_id: str) -> Optional[dict]:
+    """Authorization flags for a user, None when the user doesn't exist"""
+    flags = user_flags_cache.get(user_id)
+    if flags is not MISSING:
+        return flags
+    
+    collection = await get_collection("customers")
+    user_data = await collection.find_one({"_id": ObjectId(user_id)}, {"is_admin": 1, "is_active": 1})
+    if not user_data:
+        return None
+    
+    flags = {
+        "is_admin": user_data.get("is_admin", False),
+        "is_active": user_data.get("is_active", True)
+    }
+    user_flags_cache.set(user_id, flags)
+    return flags
+
+def invalidate_user_flags(user_id: str) -> None:
+    """Drop cached authorization flags after a user's profile or role changed"""
+    user_flags_cache.invalidate(str(user_id))
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create access token"""
     to_encode = data.copy()
@@ -42,8 +138,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def verify_token(token: str) -> dict:
     """Verify token"""
+    token_hash = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(token_hash)
+    if payload is not MISSING and payload.get("exp", float("inf")) > time.time():
+        metrics.inc("token_cache_hits_total")
+        return payload
+    
+    metrics.inc("token_cache_misses_total")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Cache until the token expires, bounded by the cache TTL
+        ttl = min(payload["exp"] - time.time(), TOKEN_CACHE_TTL) if "exp" in payload else None
+        token_cache.set(token_hash, payload, ttl)
         return payload
     except jwt.PyJWTError:
         raise HTTPException(
@@ -67,7 +173,25 @@ async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depend
 
 async def get_current_admin_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Get current admin user ID - verifies admin privileges"""
-    token = credentials.credentials
+    return await _verify_admin_token(credentials.credentials)
+
+async def get_stream_admin_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(stream_security),
+    token: Optional[str] = Query(None, description="Access token, for EventSource clients")
+) -> str:
+    """Get current admin user ID from the Authorization header or the token query parameter"""
+    if credentials:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await _verify_admin_token(token)
+
+async def _verify_admin_token(token: str) -> str:
+    """Admin user ID of an access token, verifying the user is still an active admin"""
     payload = verify_token(token)
     user_id: str = payload.get("sub")
     
@@ -78,8 +202,13 @@ async def get_current_admin_user_id(credentials: HTTPAuthorizationCredentials =
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify user is admin
-    collection = await get_collection("customers")
+    # Tokens issued to customers are rejected without a lookup,
+    # tokens without a role claim predate it and rely on the flags alone
+    if payload.get("role", ROLE_ADMIN) != ROLE_ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
     
     if not ObjectId.is_valid(user_id):
         raise HTTPException(
@@ -87,15 +216,16 @@ async def get_current_admin_user_id(credentials: HTTPAuthorizationCredentials =
             detail="Invalid user ID",
         )
     
-    user_data = await collection.find_one({"_id": ObjectId(user_id)})
+    # Verify user is still an active admin
+    user_flags = await get_user_flags(user_id)
     
-    if not user_data:
+    if not user_flags:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     
-    if not user_data.get("is_admin", False):
+    if not user_flags["is_admin"] or not user_flags["is_active"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin privileges required",
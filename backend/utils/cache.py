@@ -0,0 +1,79 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Returned by TTLCache.get for missing or expired entries
+MISSING = object()
+
+class TTLCache:
+    """Bounded in-process cache with per-entry expiry and least-recently-used eviction.
+
+    Entries live in this worker only, so cached values must be safe to serve
+    until they expire even if another worker changed the underlying data.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Cached value for key, or default when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache value for ttl seconds (the cache default when None)"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, loading it on a miss.
+
+        Concurrent misses for the same key share a single load, so a burst of
+        requests after expiry costs one computation. Failed loads aren't cached.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, load))
+            self._loading[key] = task
+        # A cancelled caller must not cancel the load other callers wait on
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a load and cache its result"""
+        try:
+            value = await load()
+            self.set(key, value)
+            return value
+        finally:
+            self._loading.pop(key, None)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached entry"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,74 @@
+import re
+from typing import List
+
+# Customer fields the normalized search fields are derived from
+CUSTOMER_SEARCH_SOURCE_FIELDS = ("username", "email", "full_name")
+
+# Internal normalized search fields stored on customer documents
+CUSTOMER_SEARCH_FIELDS = ("username_lc", "email_lc", "email_domain", "search_tokens")
+
+# Split names, usernames and email local parts into searchable words
+TOKEN_SEPARATOR = re.compile(r"[^\w]+")
+
+def customer_search_tokens(username: str, email: str, full_name: str) -> List[str]:
+    """Lowercase words a customer can be found by with a prefix match"""
+    local_part = (email or "").lower().split("@", 1)[0]
+    tokens = set()
+    for value in (full_name or "", username or "", local_part):
+        tokens.update(token for token in TOKEN_SEPARATOR.split(value.lower()) if token)
+    return sorted(tokens)
+
+def customer_search_fields(customer_doc: dict) -> dict:
+    """Normalized search fields stored on a customer document.
+
+    Everything is lowercased when written, so lookups are anchored,
+    case-sensitive prefix regexes that can walk an index.
+    """
+    username = customer_doc.get("username") or ""
+    email = (customer_doc.get("email") or "").lower()
+    full_name = customer_doc.get("full_name") or ""
+    return {
+        "username_lc": username.lower(),
+        "email_lc": email,
+        "email_domain": email.split("@", 1)[1] if "@" in email else "",
+        "search_tokens": customer_search_tokens(username, email, full_name)
+    }
+
+def strip_customer_search_fields(customer_doc: dict) -> dict:
+    """Remove the internal search fields before a customer document is returned"""
+    for field in CUSTOMER_SEARCH_FIELDS:
+        customer_doc.pop(field, None)
+    return customer_doc
+
+def _prefix(value: str) -> dict:
+    """Anchored prefix regex, usable as an index range"""
+    return {"$regex": "^" + re.escape(value)}
+
+def build_customer_search_query(keyword: str) -> dict:
+    """Indexed prefix query over the normalized customer search fields
+
+    - "@example.com" / "@exa" matches the email domain
+    - "jane@exa" matches the email address
+    - "jane sm" requires every word to prefix a name, username or email token
+    - "jane" also matches username or email prefixes
+    """
+    keyword = keyword.strip().lower()
+    if not keyword:
+        return {}
+
+    if keyword.startswith("@"):
+        return {"email_domain": _prefix(keyword[1:])}
+    if "@" in keyword:
+        return {"email_lc": _prefix(keyword)}
+
+    words = [word for word in TOKEN_SEPARATOR.split(keyword) if word]
+    if len(words) > 1:
+        return {"$and": [{"search_tokens": _prefix(word)} for word in words]}
+
+    return {
+        "$or": [
+            {"username_lc": _prefix(keyword)},
+            {"email_lc": _prefix(keyword)},
+            {"search_tokens": _prefix(words[0] if words else keyword)}
+        ]
+    }
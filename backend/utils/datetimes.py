@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+def naive_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, the form datetimes are stored and compared in
+
+    Aware values are converted to UTC, naive values are taken to be UTC already,
+    so aware and naive values of one request can be compared and sorted together.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def naive_local(value: datetime) -> datetime:
+    """Naive server-local datetime, the form datetime.now() timestamps such as created_at are stored in"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
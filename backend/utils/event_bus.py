@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+
+# Maximum number of undelivered messages per subscriber, oldest are dropped first
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_BUS_QUEUE_SIZE", "100"))
+# Seconds between SSE heartbeat comments on idle streams
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+class EventBus:
+    """In-process publish/subscribe bus with bounded subscriber queues"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        """Subscribe to a topic, returns the queue messages are delivered to"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[topic].add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue):
+        """Remove a subscriber queue from a topic"""
+        subscribers = self._subscribers.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[topic]
+
+    def publish(self, topic: str, event_type: str, data: Any) -> int:
+        """Publish a message to all subscribers of a topic, returns the number of subscribers reached"""
+        subscribers = self._subscribers.get(topic)
+        if not subscribers:
+            return 0
+
+        message = {"event": event_type, "data": jsonable_encoder(data)}
+        for queue in subscribers:
+            if queue.full():
+                # Slow consumer, drop its oldest message instead of blocking the publisher
+                queue.get_nowait()
+            queue.put_nowait(message)
+        return len(subscribers)
+
+    def subscriber_count(self, topic: str) -> int:
+        """Number of subscribers on a topic"""
+        return len(self._subscribers.get(topic, ()))
+
+event_bus = EventBus()
+
+async def sse_stream(request: Request, topic: str, bus: EventBus = event_bus):
+    """Server-Sent Events generator for a topic, with heartbeats while idle"""
+    queue = bus.subscribe(topic)
+    try:
+        yield ": connected\n\n"
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+    finally:
+        bus.unsubscribe(topic, queue)
@@ -0,0 +1,28 @@
+from typing import Union
+from bson import ObjectId
+from fastapi import status
+
+from utils.response import APIException
+
+# Collections that reference customers through a customer_id field
+CUSTOMER_REFERENCE_COLLECTIONS = ("orders", "cart_items", "tracking")
+
+def customer_key(customer_id: Union[str, ObjectId]) -> str:
+    """Canonical customer_id stored in and queried against customer-referencing collections.
+
+    Customer references are always stored as the 24 character hex string of the
+    customer's ObjectId, so every collection can share one indexable form.
+    """
+    if isinstance(customer_id, ObjectId):
+        return str(customer_id)
+    if not customer_id or not ObjectId.is_valid(customer_id):
+        raise APIException("Invalid customer ID", status.HTTP_400_BAD_REQUEST)
+    return str(ObjectId(customer_id))
+
+def customer_match(customer_id: Union[str, ObjectId]) -> dict:
+    """customer_id query condition matching both the canonical and the legacy ObjectId form.
+
+    Used for reads until migrate_customer_ids.py has rewritten every legacy reference.
+    """
+    key = customer_key(customer_id)
+    return {"$in": [key, ObjectId(key)]}
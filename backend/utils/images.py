@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+# Derivative sizes: name -> longest side in pixels
+IMAGE_VARIANTS = {
+    "thumb": 160,
+    "card": 480,
+    "detail": 1200,
+}
+
+# Derivative formats: key -> (Pillow format, file extension, save options)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+def variant_filename(original_name: str, variant: str, extension: str) -> str:
+    """File name of an image derivative, stored next to the original"""
+    return f"{Path(original_name).stem}_{variant}.{extension}"
+
+def manifest_path(original_path: Path) -> Path:
+    """Manifest written once every derivative of an image exists"""
+    return original_path.with_name(f"{original_path.stem}.variants.json")
+
+def render_variants(original_path: str) -> dict:
+    """Write resized WebP/JPEG derivatives of an image, returns its manifest
+
+    Runs in a worker process: CPU-bound decoding and resizing never touch the event loop.
+    """
+    original_path = Path(original_path)
+    manifest = {}
+
+    with Image.open(original_path) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    for variant, longest_side in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        # Only ever scales down, small originals keep their size
+        resized.thumbnail((longest_side, longest_side), Image.Resampling.LANCZOS)
+
+        entry = {"width": resized.width, "height": resized.height}
+        for key, (image_format, extension, options) in VARIANT_FORMATS.items():
+            output = resized
+            if image_format == "JPEG" and has_alpha:
+                # JPEG has no alpha channel, flatten onto white
+                output = Image.new("RGB", resized.size, (255, 255, 255))
+                output.paste(resized, mask=resized.getchannel("A"))
+            filename = variant_filename(original_path.name, variant, extension)
+            output.save(original_path.with_name(filename), image_format, **options)
+            entry[key] = filename
+        manifest[variant] = entry
+
+    # Written last, its presence means every derivative is complete
+    manifest_path(original_path).write_text(json.dumps(manifest))
+    return manifest
+
+def read_manifest(original_path: Path) -> Optional[dict]:
+    """Manifest of an image's derivatives, None while they don't exist yet"""
+    try:
+        return json.loads(manifest_path(original_path).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,38 @@
+import threading
+from typing import Callable, Dict
+
+class Metrics:
+    """In-process counters and gauges, served on /metrics"""
+
+    def __init__(self):
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        # Counters are also updated from executor threads
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> float:
+        """Current value of a counter"""
+        return self._counters.get(name, 0)
+
+    def register_gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register a gauge whose value is read when metrics are collected"""
+        self._gauges[name] = read
+
+    def snapshot(self) -> dict:
+        """Current value of every counter and gauge"""
+        with self._lock:
+            values = dict(self._counters)
+        for name, read in self._gauges.items():
+            try:
+                values[name] = read()
+            except Exception as e:
+                print(f"Warning: Failed to read gauge {name}: {e}")
+        return dict(sorted(values.items()))
+
+# Shared metrics registry
+metrics = Metrics()
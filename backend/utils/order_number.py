@@ -0,0 +1,93 @@
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Order numbers look like AWE<yy><mm><dd><nnnn>, see Order.generate_order_number
+ORDER_NUMBER_PREFIX = "AWE"
+ORDER_NUMBER_LENGTH = len(ORDER_NUMBER_PREFIX) + 10
+
+# Supported lookup modes
+MODE_AUTO = "auto"
+MODE_EXACT = "exact"
+MODE_PREFIX = "prefix"
+MODE_CONTAINS = "contains"
+ORDER_NUMBER_MODES = (MODE_AUTO, MODE_EXACT, MODE_PREFIX, MODE_CONTAINS)
+
+# Order number and created_at are taken a few moments apart, allow for midnight rollover
+DATE_RANGE_SLACK = timedelta(minutes=5)
+
+def normalize_order_number(order_number: str) -> str:
+    """Normalize order number to its stored form (upper case, no whitespace)"""
+    return order_number.strip().upper()
+
+def resolve_order_number_mode(order_number: str, mode: Optional[str] = MODE_AUTO) -> str:
+    """Resolve 'auto' mode to exact, prefix or contains based on the input shape"""
+    mode = (mode or MODE_AUTO).lower()
+    if mode not in ORDER_NUMBER_MODES:
+        raise ValueError(f"Invalid order number mode: {mode}")
+    if mode != MODE_AUTO:
+        return mode
+
+    value = normalize_order_number(order_number)
+    if not value.startswith(ORDER_NUMBER_PREFIX):
+        return MODE_CONTAINS
+    if len(value) == ORDER_NUMBER_LENGTH:
+        return MODE_EXACT
+    return MODE_PREFIX
+
+def order_number_date_range(order_number: str) -> Optional[tuple[datetime, datetime]]:
+    """Derive a [start, end) creation date range from the date embedded in an order number prefix"""
+    value = normalize_order_number(order_number)
+    if not value.startswith(ORDER_NUMBER_PREFIX):
+        return None
+
+    digits = value[len(ORDER_NUMBER_PREFIX):len(ORDER_NUMBER_PREFIX) + 6]
+    if not digits.isdigit():
+        return None
+
+    try:
+        year = 2000 + int(digits[0:2]) if len(digits) >= 2 else None
+        if year is None:
+            return None
+        if len(digits) < 4:
+            return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+        month = int(digits[2:4])
+        if len(digits) < 6:
+            start = datetime(year, month, 1)
+            end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+            return start, end
+
+        start = datetime(year, month, int(digits[4:6]))
+        return start, datetime.fromordinal(start.toordinal() + 1)
+    except ValueError:
+        # Not a valid calendar date, no narrowing possible
+        return None
+
+def build_order_number_query(order_number: str, mode: Optional[str] = MODE_AUTO) -> dict:
+    """Build a query for order_number that uses the order_number index where possible"""
+    resolved_mode = resolve_order_number_mode(order_number, mode)
+    value = normalize_order_number(order_number)
+
+    if resolved_mode == MODE_EXACT:
+        query = {"order_number": value}
+    elif resolved_mode == MODE_PREFIX:
+        # Anchored, case-sensitive regex on the normalized value is served by the index
+        query = {"order_number": {"$regex": f"^{re.escape(value)}"}}
+    else:
+        return {"order_number": {"$regex": re.escape(order_number.strip()), "$options": "i"}}
+
+    date_range = order_number_date_range(value)
+    if date_range:
+        query["created_at"] = {"$gte": date_range[0], "$lt": date_range[1] + DATE_RANGE_SLACK}
+
+    return query
+
+def merge_query(query: dict, extra: dict) -> dict:
+    """Merge extra conditions into query, combining clashing fields with $and"""
+    for field, condition in extra.items():
+        if field in query:
+            query.setdefault("$and", []).append({field: condition})
+        else:
+            query[field] = condition
+    return query
@@ -0,0 +1,70 @@
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from fastapi import Request
+
+# Reverse proxies in front of the API that each append the address they received a request
+# from to X-Forwarded-For (1 on Render). Entries left of those hops are client supplied.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+def client_address(request: Request) -> Optional[str]:
+    """Client address used to key rate limits
+
+    Behind TRUSTED_PROXY_HOPS proxies this is the entry the outermost proxy appended to
+    X-Forwarded-For, never the leftmost one, which any client can set to a fresh value.
+    """
+    if TRUSTED_PROXY_HOPS > 0:
+        forwarded_for = [host.strip() for host in request.headers.get("x-forwarded-for", "").split(",") if host.strip()]
+        if len(forwarded_for) >= TRUSTED_PROXY_HOPS:
+            return forwarded_for[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else None
+
+class SlidingWindowLimiter:
+    """In-memory sliding window limiter: at most limit hits per key within window seconds"""
+
+    # Sweep idle keys once this many keys are tracked
+    SWEEP_THRESHOLD = 10000
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._hits: Dict[str, Deque[float]] = {}
+
+    def _recent(self, key: str, now: float) -> Deque[float]:
+        """Hits for key still inside the window"""
+        hits = self._hits.get(key)
+        if hits is None:
+            return deque()
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if not hits:
+            del self._hits[key]
+        return hits
+
+    def is_limited(self, key: str) -> bool:
+        """Whether key already used up its hits for the current window"""
+        return len(self._recent(key, time.monotonic())) >= self.limit
+
+    def retry_after(self, key: str) -> int:
+        """Seconds until key gets a hit back"""
+        now = time.monotonic()
+        hits = self._recent(key, now)
+        return max(int(hits[0] + self.window - now) + 1, 1) if hits else 0
+
+    def hit(self, key: str) -> None:
+        """Record a hit for key"""
+        now = time.monotonic()
+        if len(self._hits) >= self.SWEEP_THRESHOLD:
+            self._sweep(now)
+        self._recent(key, now)
+        self._hits.setdefault(key, deque()).append(now)
+
+    def reset(self, key: str) -> None:
+        """Forget every hit for key"""
+        self._hits.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        """Drop keys without hits inside the window"""
+        for key in list(self._hits):
+            self._recent(key, now)
@@ -0,0 +1,155 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Supported analytics bucket sizes
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Supported analytics metrics
+ANALYTICS_METRICS = ("orders", "revenue", "units", "average_order_value")
+
+# Order value percentiles reported for the requested range
+ORDER_VALUE_PERCENTILES = (50, 75, 90, 95, 99)
+
+# Row columns the analytics are computed from
+ROW_COLUMNS = ("orders", "revenue_orders", "revenue", "units")
+
+def bucket_floor(timestamps: np.ndarray, granularity: str) -> np.ndarray:
+    """Start of the bucket containing each timestamp, as datetime64[s]"""
+    if granularity == "hour":
+        return timestamps.astype("datetime64[h]").astype("datetime64[s]")
+    if granularity == "month":
+        return timestamps.astype("datetime64[M]").astype("datetime64[s]")
+
+    days = timestamps.astype("datetime64[D]")
+    if granularity == "week":
+        # 1970-01-01 was a Thursday, weeks start on Monday
+        days = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    return days.astype("datetime64[s]")
+
+def bucket_starts(start: datetime, end: datetime, granularity: str) -> np.ndarray:
+    """Start of every bucket from the one containing start to the one containing end"""
+    first, last = bucket_floor(np.array([start, end], dtype="datetime64[s]"), granularity)
+    if granularity == "month":
+        months = np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 1)
+        return months.astype("datetime64[s]")
+
+    step = np.timedelta64(1, "h") if granularity == "hour" else np.timedelta64(7 if granularity == "week" else 1, "D")
+    return np.arange(first, last + step, step).astype("datetime64[s]")
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing moving average, NaN until a full window is available"""
+    averages = np.full(len(values), np.nan)
+    if window <= 1:
+        return values.astype(float)
+    if len(values) >= window:
+        cumulative = np.cumsum(np.insert(values.astype(float), 0, 0.0))
+        averages[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return averages
+
+def period_deltas(values: np.ndarray) -> tuple:
+    """Change and percentage change of every bucket against the previous bucket"""
+    previous = np.concatenate(([np.nan], values[:-1].astype(float)))
+    delta = values - previous
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = np.where(previous > 0, delta * 100 / previous, np.nan)
+    return delta, percent
+
+def _average_order_value(revenue, revenue_orders):
+    """Revenue per revenue-counted order, 0 without orders"""
+    return np.divide(
+        revenue,
+        revenue_orders,
+        out=np.zeros(np.shape(revenue), dtype=float),
+        where=np.asarray(revenue_orders) > 0
+    )
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    """JSON-friendly list, NaN becomes None"""
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+def _percent_change(current: float, previous: float) -> Optional[float]:
+    """Percentage change from previous to current"""
+    return round((current - previous) * 100 / previous, 2) if previous else None
+
+def compute_sales_analytics(
+    timestamps: Sequence[datetime],
+    rows: Dict[str, Sequence[float]],
+    order_values: Sequence[float],
+    start: datetime,
+    end: datetime,
+    previous_start: datetime,
+    granularity: str,
+    metrics: Sequence[str],
+    window: int
+) -> dict:
+    """Bucketed sales series with moving averages, deltas, period comparison and order value percentiles
+
+    rows holds one value per timestamp for each of ROW_COLUMNS (daily rollup documents
+    or hourly order totals). Rows from previous_start up to start feed the previous-period
+    comparison, rows from start to end the series.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+    columns = {column: np.asarray(rows[column], dtype=float) for column in ROW_COLUMNS}
+    start64, end64, previous_start64 = np.array([start, end, previous_start], dtype="datetime64[s]")
+
+    # Bucket totals for the requested range
+    starts = bucket_starts(start, end, granularity)
+    current = (timestamps >= start64) & (timestamps <= end64)
+    index = np.searchsorted(starts, bucket_floor(timestamps[current], granularity))
+    buckets = {
+        column: np.bincount(index, weights=values[current], minlength=len(starts))
+        for column, values in columns.items()
+    }
+    buckets["average_order_value"] = _average_order_value(buckets["revenue"], buckets["revenue_orders"])
+
+    # Totals for the requested and the previous range
+    previous = (timestamps >= previous_start64) & (timestamps < start64)
+    totals = {column: values[current].sum() for column, values in columns.items()}
+    previous_totals = {column: values[previous].sum() for column, values in columns.items()}
+    totals["average_order_value"] = float(_average_order_value(totals["revenue"], totals["revenue_orders"]))
+    previous_totals["average_order_value"] = float(
+        _average_order_value(previous_totals["revenue"], previous_totals["revenue_orders"])
+    )
+
+    series = {}
+    summary = {}
+    for metric in metrics:
+        values = buckets[metric]
+        delta, delta_percent = period_deltas(values)
+        series[metric] = {
+            "values": _to_list(values),
+            "moving_average": _to_list(moving_average(values, window)),
+            "delta": _to_list(delta),
+            "delta_percent": _to_list(delta_percent)
+        }
+        summary[metric] = {
+            "current": round(float(totals[metric]), 2),
+            "previous": round(float(previous_totals[metric]), 2),
+            "delta_percent": _percent_change(float(totals[metric]), float(previous_totals[metric]))
+        }
+
+    order_values = np.asarray(order_values, dtype=float)
+    if len(order_values):
+        percentiles = np.percentile(order_values, ORDER_VALUE_PERCENTILES)
+        order_value_percentiles = {
+            f"p{percentile}": round(float(value), 2)
+            for percentile, value in zip(ORDER_VALUE_PERCENTILES, percentiles)
+        }
+    else:
+        order_value_percentiles = {f"p{percentile}": None for percentile in ORDER_VALUE_PERCENTILES}
+
+    return {
+        "range": {
+            "start": start,
+            "end": end,
+            "previous_start": previous_start,
+            "granularity": granularity,
+            "window": window
+        },
+        "buckets": [str(bucket) for bucket in starts],
+        "series": series,
+        "summary": summary,
+        "order_value_percentiles": order_value_percentiles
+    }
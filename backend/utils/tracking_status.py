@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from models.tracking import TrackingStatus
+
+# Default days to delivery for statuses without an entry below
+DEFAULT_DELIVERY_DAYS = 7
+
+# Estimated days remaining until delivery per tracking status
+DELIVERY_DAYS = {
+    TrackingStatus.ORDER_CREATED: 7,
+    TrackingStatus.PAYMENT_RECEIVED: 6,
+    TrackingStatus.ORDER_CONFIRMED: 5,
+    TrackingStatus.PROCESSING: 4,
+    TrackingStatus.PACKED: 3,
+    TrackingStatus.SHIPPED: 2,
+    TrackingStatus.IN_TRANSIT: 1,
+    TrackingStatus.OUT_FOR_DELIVERY: 0.5,
+}
+
+# Statuses without a delivery estimate
+NO_ESTIMATE_STATUSES = frozenset({
+    TrackingStatus.DELIVERED,
+    TrackingStatus.CANCELLED,
+    TrackingStatus.REFUNDED,
+})
+
+# Statuses after which an order no longer moves through the delivery pipeline
+TERMINAL_STATUSES = (
+    TrackingStatus.DELIVERED,
+    TrackingStatus.CANCELLED,
+    TrackingStatus.REFUNDED,
+    TrackingStatus.RETURNED,
+)
+
+# Delivery progress percentage per tracking status
+PROGRESS_PERCENTAGE = {
+    TrackingStatus.ORDER_CREATED: 10,
+    TrackingStatus.PAYMENT_RECEIVED: 20,
+    TrackingStatus.ORDER_CONFIRMED: 30,
+    TrackingStatus.PROCESSING: 40,
+    TrackingStatus.PACKED: 50,
+    TrackingStatus.SHIPPED: 60,
+    TrackingStatus.IN_TRANSIT: 80,
+    TrackingStatus.OUT_FOR_DELIVERY: 90,
+    TrackingStatus.DELIVERED: 100,
+    TrackingStatus.CANCELLED: 0,
+    TrackingStatus.REFUNDED: 0,
+}
+
+# Precomputed offset from order creation to estimated delivery, None means no estimate
+DELIVERY_OFFSETS = {
+    status: None if status in NO_ESTIMATE_STATUSES else timedelta(days=DELIVERY_DAYS.get(status, DEFAULT_DELIVERY_DAYS))
+    for status in TrackingStatus
+}
+
+def delivery_estimate(status: TrackingStatus, created_at: datetime) -> Optional[datetime]:
+    """Estimated delivery time for an order created at created_at"""
+    offset = DELIVERY_OFFSETS.get(status, DELIVERY_OFFSETS[TrackingStatus.ORDER_CREATED])
+    return created_at + offset if offset is not None else None
+
+def progress_percentage(status: TrackingStatus) -> int:
+    """Delivery progress percentage"""
+    return PROGRESS_PERCENTAGE.get(status, 0)
+
+def shipping_method(estimated_days: float) -> str:
+    """Shipping method label for the remaining days to delivery"""
+    if estimated_days <= 1:
+        return "Express Shipping"
+    if estimated_days <= 3:
+        return "Fast Shipping"
+    return "Standard Shipping"
+
+# Precomputed (days remaining, shipping method) per status, for estimates relative to now
+REMAINING_DELIVERY = {
+    status: (DELIVERY_DAYS.get(status, DEFAULT_DELIVERY_DAYS), shipping_method(DELIVERY_DAYS.get(status, DEFAULT_DELIVERY_DAYS)))
+    for status in TrackingStatus
+}
+
+def remaining_delivery(status: TrackingStatus) -> tuple[float, str]:
+    """Days remaining until delivery and shipping method for the current status"""
+    return REMAINING_DELIVERY.get(status, REMAINING_DELIVERY[TrackingStatus.ORDER_CREATED])
+
+def batch_delivery_estimates(statuses: Sequence[TrackingStatus], created_ats: Sequence[datetime]) -> List[Optional[datetime]]:
+    """Estimated delivery times for a page of tracking records in one pass"""
+    offsets = [DELIVERY_OFFSETS.get(status, DELIVERY_OFFSETS[TrackingStatus.ORDER_CREATED]) for status in statuses]
+    return [
+        created_at + offset if offset is not None else None
+        for offset, created_at in zip(offsets, created_ats)
+    ]
+
+def batch_progress_percentages(statuses: Sequence[TrackingStatus]) -> List[int]:
+    """Delivery progress percentages for a page of tracking records in one pass"""
+    return [PROGRESS_PERCENTAGE.get(status, 0) for status in statuses]
+
+def annotate_delivery_estimates(tracking_docs: List[dict]) -> List[dict]:
+    """Set estimated_delivery on a page of tracking documents in place"""
+    estimates = batch_delivery_estimates(
+        [doc["current_status"] for doc in tracking_docs],
+        [doc["created_at"] for doc in tracking_docs]
+    )
+    for doc, estimate in zip(tracking_docs, estimates):
+        doc["estimated_delivery"] = estimate
+    return tracking_docs
@@ -0,0 +1,67 @@
+import os
+import hashlib
+from pathlib import Path
+from typing import Tuple
+
+from fastapi import UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from utils.response import APIException
+
+# Largest accepted upload
+MAX_UPLOAD_SIZE_MB = float(os.getenv("MAX_UPLOAD_SIZE_MB", "10"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_SIZE_MB * 1024 * 1024)
+
+# Bytes read from the upload and written to disk per step
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def _too_large(max_bytes: int) -> APIException:
+    return APIException(
+        f"File too large, maximum size is {max_bytes / (1024 * 1024):g} MB",
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    )
+
+async def save_upload(file: UploadFile, file_path: Path, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[int, str]:
+    """Stream an upload to file_path in chunks, returns (size in bytes, sha256 hex digest)
+
+    Disk writes and hashing run in the thread pool, so neither the whole file is held
+    in memory nor is the event loop blocked. The file only appears at file_path once
+    it was written completely and within max_bytes.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    partial_path = file_path.with_name(file_path.name + ".part")
+    digest = hashlib.sha256()
+    size = 0
+
+    buffer = await run_in_threadpool(open, partial_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+        await run_in_threadpool(buffer.close)
+        await run_in_threadpool(os.replace, partial_path, file_path)
+    except BaseException:
+        await run_in_threadpool(_discard, buffer, partial_path)
+        raise
+
+    return size, digest.hexdigest()
+
+def _write_chunk(buffer, digest, chunk: bytes):
+    """Write a chunk and add it to the content hash"""
+    buffer.write(chunk)
+    digest.update(chunk)
+
+def _discard(buffer, partial_path: Path):
+    """Remove a partially written upload"""
+    buffer.close()
+    try:
+        partial_path.unlink()
+    except FileNotFoundError:
+        pass